@@ -30,9 +30,26 @@ SAVE_IMAGE = False
 
 USE_INIT_OMIT = True
 
+# parallel execution
+# number of worker processes for the trackers which don't need MATLAB,
+# overridden by run_trackers.py -j; the MATLAB trackers run on MATLAB_ENGINES
+# more processes
+NUM_JOBS = 1
+
+# the number of concurrent jobs of a tracker, or of a group of trackers which
+# share files or engines, is limited by scripts/bscripts/registry.py; limits
+# in this dictionary override the registry, e.g. {'matlab': 4}
+TRACKER_JOB_LIMITS = {}
+
+# parent directory of the per-job scratch directories of the external
+# trackers; None uses the system temporary directory
+SCRATCH_SRC = None
+
 # sequence configs
 DOWNLOAD_SEQS = False
 DOWNLOAD_URL = "http://cvlab.hanyang.ac.kr/tracker_benchmark/seq_new/{0}.zip"
+DOWNLOAD_JOBS = 4   # number of archives downloaded at once
+DOWNLOAD_MANIFEST = 'checksums.sha256'  # sha256sum lines of the archives
 ATTR_LIST_FILE = 'attr_list.txt'
 ATTR_DESC_FILE = 'attr_desc.txt'
 TB_50_FILE = 'tb_50.txt'
@@ -48,9 +65,40 @@ shiftTypeSet = ['left','right','up','down','topLeft','topRight',
 # for evaluating results
 thresholdSetOverlap = [x/float(20) for x in range(21)]
 thresholdSetError = range(0, 51)
+# scores for combinations of attributes, besides the single attributes,
+# e.g. ['OCC AND FM', 'IV OR LR']
+ATTR_COMBINATIONS = []
+# bootstrap confidence bands of the scores, and sign flip tests between
+# trackers, see scripts/butil/bootstrap.py; 0 resamples turns them off, and
+# e.g. 2000 turns them on
+BOOTSTRAP_RESAMPLES = 0
+PERMUTATIONS = 5000
+CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 0
+# cache each sequence's evaluation, see scripts/butil/eval_cache.py
+EVAL_CACHE = True
+# score results as they come in, and print the success AUC after each
+# sequence, see scripts/butil/online_eval.py
+ONLINE_EVAL = False
+# stop running a tracker whose success AUC is below this, e.g. 0.2, after
+# EARLY_ABORT_MIN_SEQS sequences; None never stops a tracker
+EARLY_ABORT_AUC = None
+EARLY_ABORT_MIN_SEQS = 10
+
+# decoded frames, see scripts/butil/frames.py
+FRAME_CACHE_MB = 256    # size of the decoded frame cache of each process
+# a shared memory ring of decoded frames for all processes, e.g.
+# {'name': 'otb_frames', 'slots': 512, 'slot_mb': 3}; None disables it
+FRAME_RING = None
 
 # for drawing plot
 MAXIMUM_LINES = 10
 LINE_COLORS = ['b','g','r','c','m','y','k', '#880015', '#FF7F27', '#00A2E8']
 
-m = None    # matlab engine
+# run py-MDNet style trackers in long-lived worker processes, see
+# scripts/bscripts/py_worker.py; the tracker repository must provide
+# tracking/run_tracker.py:run_mdnet(img_list, init_bbox)
+PERSISTENT_PY_WORKERS = False
+
+# number of processes which run the matlab trackers, each with a warm engine
+MATLAB_ENGINES = 1
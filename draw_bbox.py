@@ -1,110 +1,119 @@
-import numpy as np
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from PIL import Image
 from config import *
-from scripts import *
+import scripts.butil.frames
+import scripts.butil.image_size
+import scripts.butil.load_results
+import scripts.butil.result_store
+import scripts.butil.seq_config
 
 
 def main():
     evalTypes = ['OPE', 'SRE', 'TRE']
-    print "Eval types"
+    print("Eval types")
     for i in range(len(evalTypes)):
         evalType = evalTypes[i]
-        print "{0:2d}. {1}".format(i+1, evalType)
+        print("{0:2d}. {1}".format(i+1, evalType))
 
     while True:
-        n = int(raw_input("\nInput evalType number (-1 to exit) : "))
+        n = int(input("\nInput evalType number (-1 to exit) : "))
         if n == -1:
             sys.exit()
         try:
             evalType = evalTypes[n-1]
             break
         except:
-            print "invalid number"
+            print("invalid number")
 
     src = RESULT_SRC.format(evalType)
     trackers = os.listdir(src)
-    print "\nTrackers"
+    print("\nTrackers")
     for i in range(len(trackers)):
         t = trackers[i]
-        print "{0:2d}. {1}".format(i+1, t)
+        print("{0:2d}. {1}".format(i+1, t))
 
     while True:
-        n = int(raw_input("\nInput tracker number (-1 to exit) : "))
+        n = int(input("\nInput tracker number (-1 to exit) : "))
         if n == -1:
             sys.exit()
         try:
             tracker = trackers[n-1]
             break
         except:
-            print "invalid number"
+            print("invalid number")
+
+    seqs = scripts.butil.result_store.seq_names(evalType, tracker)
+    if not seqs:
+        # results saved before the result store
+        seqs = sorted(x[:-len('.json')] for x in
+            os.listdir(os.path.join(src, tracker)) if x.endswith('.json'))
 
-    src = os.path.join(src, tracker)
-    seqs = [x for x in os.listdir(src) if x.endswith('.json')]    
-  
     while True:
-        print "\nSequences"
+        print("\nSequences")
         for i in range(len(seqs)):
             s = seqs[i]
-            print "{0:2d}. {1}".format(i+1, s)
-        results = []
-        n = int(raw_input("\nInput sequence number (-1 to exit) : "))
+            print("{0:2d}. {1}".format(i+1, s))
+        n = int(input("\nInput sequence number (-1 to exit) : "))
         if n == -1:
             sys.exit()
         try:
-            resultFile = open(os.path.join(src, seqs[n-1]))
+            results = scripts.butil.load_results.load_seq_result(evalType,
+                tracker, seqs[n-1])
         except:
-            print "invalid number"
-
-        string = resultFile.read()
-        jsonList = json.loads(string)
-        for j in jsonList:
-            result = Result(**j)
-            results.append(result)
+            print("invalid number")
+            continue
 
         for i in range(len(results)):
             result = results[i]
-            print "{0:2d}. startFrame : {1},\tshiftType : {2}".format(i+1, result.startFrame, result.shiftType)
+            print("{0:2d}. startFrame : {1},\tshiftType : {2}".format(i+1, result.startFrame, result.shiftType))
 
-        n = int(raw_input("\nInput result number (-1 to exit) : "))
+        n = int(input("\nInput result number (-1 to exit) : "))
         if n == -1:
             sys.exit()
         try:
             result = results[n-1]
         except:
-            print "invalid number"
+            print("invalid number")
             continue
 
-        seq = butil.load_seq_config(result.seqName)
+        seq = scripts.butil.seq_config.load_seq_configs([result.seqName])[0]
         startFrame = result.startFrame
         view_result(seq, result.res, startFrame)
-    
 
-def view_result(seq, res, startIndex):
-    fig = plt.figure()
 
-    src = os.path.join(SEQ_SRC, seq.name)
-    image = Image.open(src + '/img/{0:04d}.jpg'.format(startIndex)).convert('RGB')
-    im = plt.imshow(image, zorder=0)
+def view_result(seq, res, startIndex):
+    # The figure has the frames' aspect ratio, from the sequence's
+    # configuration or the first frame's header.
+    width, height = scripts.butil.image_size.seq_size(seq)
+    fig = plt.figure(figsize=(8, 8 * height / width))
+
+    # The frames are decoded once, and shared with anything else in this
+    # process, see scripts/butil/frames.py.
+    frames = scripts.butil.frames.get_provider()
+    src = seq.path
+    image = frames.get(src + seq.imgFormat.format(startIndex))
+    im = plt.imshow(image, zorder=0, extent=(0, width, height, 0))
 
     x, y, w, h = get_coordinate(res[0])
     gx, gy, gw, gh = get_coordinate(seq.gtRect[startIndex-seq.startFrame])
 
-    rect = plt.Rectangle((x, y), w, h, 
+    rect = plt.Rectangle((x, y), w, h,
       linewidth=5, edgecolor="#ff0000", zorder=1, fill=False)
-    gtRect = plt.Rectangle((gx, gy), gw, gh, 
+    gtRect = plt.Rectangle((gx, gy), gw, gh,
       linewidth=5, edgecolor="#00ff00", zorder=1, fill=False)
     plt.gca().add_patch(rect)
     plt.gca().add_patch(gtRect)
 
-    def update_fig(num, startIndex, res, gt, src, startFrame):    
+    def update_fig(num, startIndex, res, gt, src, startFrame):
         r = res[num]
         g = gt[num+startIndex-startFrame]
         x, y, w, h = get_coordinate(r)
         gx, gy, gw, gh = get_coordinate(g)
         i = startIndex + num
-        image = Image.open(src + '/img/{0:04d}.jpg'.format(i)).convert('RGB')
+        image = frames.get(src + seq.imgFormat.format(i))
         im.set_data(image)
         rect.set_xy((x,y))
         rect.set_width(w)
@@ -114,14 +123,14 @@ def view_result(seq, res, startIndex):
         gtRect.set_height(gh)
         return im, rect, gtRect
 
-    ani = animation.FuncAnimation(fig, update_fig, 
+    ani = animation.FuncAnimation(fig, update_fig,
         frames=len(res), fargs=(startIndex, res, seq.gtRect, src, seq.startFrame), interval=10, blit=True)
     plt.axis("off")
     plt.show()
 
 def get_coordinate(res):
     return int(res[0]), int(res[1]), int(res[2]), int(res[3])
-  
+
 
 if __name__ == '__main__':
     main()
@@ -5,7 +5,7 @@ import math
 import sys
 
 import config
-from scripts.butil import load_results, graphs
+from scripts.butil import graphs, leaderboard
 
 def main():
     evalTypes = ['OPE']
@@ -16,13 +16,12 @@ def main():
 
     for i in range(len(evalTypes)):
         evalType = evalTypes[i]
-        result_src = config.RESULT_SRC.format(evalType)
-        trackers = os.listdir(result_src)
+        # one file with the scores of all the trackers, see
+        # scripts/butil/leaderboard.py
+        trackerScores = leaderboard.get_scores(evalType, testname)
+        trackers = [t for t, _ in trackerScores]
         tracker_colors = graphs.get_color_table(trackers)
-        scoreList = []
-        for t in trackers:
-            score = load_results.load_scores(evalType, t, testname)
-            scoreList.append(score)
+        scoreList = [scores for _, scores in trackerScores]
         if graph == 'precision':
             plt = get_precision_graph(scoreList, i, evalType, testname)
         else:
@@ -80,6 +79,10 @@ def get_precision_graph(scoreList, fignum, evalType, testname):
                     ls = '--'
                 plt.plot(config.thresholdSetError, attr.precisionList, 
                     c = config.LINE_COLORS[i], label='{0} [{1:.2f}]'.format(tracker, attr.precisionList[20]), lw=2.0, ls = ls)
+                if attr.precisionCI is not None:
+                    plt.fill_between(config.thresholdSetError,
+                        attr.precisionCI[0], attr.precisionCI[1],
+                        color=config.LINE_COLORS[i], alpha=0.15, lw=0)
             #else:
             #    plt.plot(config.thresholdSetError, attr.precisionList, 
             #        label='', alpha=0.5, c='#202020', ls='--')
@@ -8,9 +8,10 @@ from PIL import Image
 import config
 import scripts.butil.seq_config
 import scripts.butil.load_results
+import scripts.butil.bootstrap
 import scripts.butil.eval_results
-import scripts.bscripts.run_MDNet
-from scripts.model.result import Result
+import scripts.butil.online_eval
+import scripts.butil.scheduler
 
 
 def main(argv):
@@ -18,19 +19,20 @@ def main(argv):
     trackers = os.listdir(config.TRACKER_SRC)
     evalTypes = ['OPE', 'SRE', 'TRE']
     loadSeqs = 'TB50'
+    numJobs = config.NUM_JOBS
     seqs = []
     try:
-        opts, args = getopt.getopt(argv, "ht:e:s:",["tracker=","evaltype="
-            ,"sequence="])
+        opts, args = getopt.getopt(argv, "ht:e:s:j:",["tracker=","evaltype="
+            ,"sequence=","jobs="])
     except getopt.GetoptError:
         print('usage : run_trackers.py -t <trackers> -s <sequences>' \
-            + '-e <evaltypes>')
+            + '-e <evaltypes> -j <jobs>')
         sys.exit(1)
 
     for opt, arg in opts:
         if opt == '-h':
             print('usage : run_trackers.py -t <trackers> -s <sequences>' \
-                + '-e <evaltypes>')
+                + '-e <evaltypes> -j <jobs>')
             sys.exit(0)
         elif opt in ("-t", "--tracker"):
             trackers = [x.strip() for x in arg.split(',')]
@@ -44,6 +46,8 @@ def main(argv):
         elif opt in ("-e", "--evaltype"):
             evalTypes = [x.strip() for x in arg.split(',')]
             # evalTypes = [arg]
+        elif opt in ("-j", "--jobs"):
+            numJobs = int(arg)
 
     if config.SETUP_SEQ:
         print('Setup sequences ...')
@@ -54,13 +58,39 @@ def main(argv):
     for evalType in evalTypes:
         seqNames = scripts.butil.seq_config.get_seq_names(loadSeqs)
         seqs = scripts.butil.seq_config.load_seq_configs(seqNames)
+        evaluators = None
+        if config.ONLINE_EVAL or config.EARLY_ABORT_AUC is not None:
+            evaluators = dict((t, scripts.butil.online_eval.OnlineEvaluator(
+                t, seqs, evalType)) for t in trackers)
         trackerResults = run_trackers(
-            trackers, seqs, evalType, config.shiftTypeSet)
+            trackers, seqs, evalType, config.shiftTypeSet, numJobs, evaluators)
+        trackerScores = dict()
+        trackerCurves = dict()
         for tracker in trackers:
             results = trackerResults[tracker]
-            if len(results) > 0:
+            if evaluators is not None and evaluators[tracker].aborted:
+                print(f"'{tracker}' aborted, success AUC "
+                    f"{evaluators[tracker].auc():.3f} is below "
+                    f"{config.EARLY_ABORT_AUC}")
+                continue
+            attrList = None
+            if evaluators is not None:
+                # The evaluator has the curves of each finished sequence, so
+                # the results aren't kept or evaluated again.
+                curves = evaluators[tracker].curves(finished=True)
+                if len(curves) > 0:
+                    attrList = scripts.butil.eval_results.calc_scores(tracker,
+                        seqs, evalType, curves, config.ATTR_COMBINATIONS)
+            elif len(results) > 0:
+                curves = dict()
                 evalResults, attrList = scripts.butil.eval_results.calc_result(tracker,
-                    seqs, results, evalType)
+                    seqs, results, evalType, config.ATTR_COMBINATIONS,
+                    curves)
+            if attrList is not None:
+                trackerScores[tracker] = attrList
+                trackerCurves[tracker] = curves
+                if config.SAVE_RESULT:
+                    scripts.butil.load_results.save_scores(attrList, testname)
                 print(f"Result of Sequences\t -- '{tracker}'")
                 #print "Result of Sequences\t -- '{0}'".format(tracker)
                 for seq in seqs:
@@ -81,79 +111,67 @@ def main(argv):
                     #print "\toverlap : {0:02.1f}%".format(attr.overlap),
                     #print "\tfailures : {0:.1f}".format(attr.error)
 
-                if config.SAVE_RESULT : 
+        # The confidence bands and the tests between the trackers need the
+        # scores of all of them, so the scores are saved again with them.
+        if config.BOOTSTRAP_RESAMPLES > 0:
+            scripts.butil.bootstrap.add_confidence(trackerScores,
+                trackerCurves)
+            if config.SAVE_RESULT :
+                for attrList in trackerScores.values():
                     scripts.butil.load_results.save_scores(attrList, testname)
 
-def run_trackers(trackers, seqs, evalType, shiftTypeSet):
-    tmpRes_path = config.RESULT_SRC.format('tmp/{0}/'.format(evalType))
-    if not os.path.exists(tmpRes_path):
-        os.makedirs(tmpRes_path)
-
-    numSeq = len(seqs)
-    numTrk = len(trackers)
-
+def run_trackers(trackers, seqs, evalType, shiftTypeSet,
+    numJobs=config.NUM_JOBS, evaluators=None):
+    # evaluators maps trackers to scripts.butil.online_eval.OnlineEvaluator
+    # objects, which score the results as they come in, see
+    # scripts/butil/online_eval.py. The results are then dropped once they
+    # are saved, and the returned lists are empty.
     trackerResults = dict((t,list()) for t in trackers)
-    for idxSeq in range(numSeq):
-        s = seqs[idxSeq]
-        
-        subSeqs, subAnno = scripts.butil.seq_config.get_sub_seqs(s, 20.0, evalType)
+    savedResults = dict()
 
-        for idxTrk in range(len(trackers)):         
-            t = trackers[idxTrk]
-            seqResults = []
-            if not config.OVERWRITE_RESULT:
-                trk_src = os.path.join(config.RESULT_SRC.format(evalType), t)
-                result_src = os.path.join(trk_src, s.name+'.json')
-                if os.path.exists(result_src):
-                    seqResults = scripts.butil.load_results.load_seq_result(evalType, t, s.name)
-                    trackerResults[t].append(seqResults)
-                    continue
-            seqLen = len(subSeqs)
-            for idx in range(seqLen):
-                print(f'{idxTrk + 1}_{t}, {idxSeq + 1}_{s.name}:{idx + 1}/{seqLen} - {evalType}')
-                #print '{0}_{1}, {2}_{3}:{4}/{5} - {6}'.format(
-                #    idxTrk + 1, t, idxSeq + 1, s.name, idx + 1, seqLen, \
-                #    evalType)
-                rp = tmpRes_path + '_' + t + '_' + str(idx+1) + '/'
-                if config.SAVE_IMAGE and not os.path.exists(rp):
-                    os.makedirs(rp)
-                subS = subSeqs[idx]
-                subS.name = s.name + '_' + str(idx)
-                
-                move_dir = False
-                if os.path.exists(os.path.join(config.TRACKER_SRC, t)):
-                    move_dir = True
-                    os.chdir(os.path.join(config.TRACKER_SRC, t))
-                funcName = f"scripts.bscripts.run_{t}.run_{t}(subS, rp, config.SAVE_IMAGE)"
-                try:
-                    res = eval(funcName)
-                except:
-                    print(f'failed to execute {t} : {sys.exc_info()}')
-                    #print 'failed to execute {0} : {1}'.format(
-                    #    t, sys.exc_info())
-                    if move_dir:
-                        os.chdir(WORKDIR)         
-                    break
-                if move_dir:
-                    os.chdir(WORKDIR)
+    def skip(t, s):
+        if config.OVERWRITE_RESULT:
+            return False
+        if not scripts.butil.load_results.has_seq_result(evalType, t, s.name):
+            return False
+        results = scripts.butil.load_results.load_seq_result(evalType, t,
+            s.name)
+        if evaluators is None:
+            savedResults[(t, s.name)] = results
+            return True
+        for result in results:
+            evaluators[t].add_result(result)
+        evaluators[t].finish_seq(s.name)
+        return True
 
-                if evalType == 'SRE':
-                    r = Result(t, s.name, subS.startFrame, subS.endFrame,
-                        res['type'], evalType, res['res'], res['fps'], shiftTypeSet[idx])
-                else:
-                    r = Result(t, s.name, subS.startFrame, subS.endFrame,
-                        res['type'], evalType, res['res'], res['fps'], None)
-                try: r.tmplsize = res['tmplsize'][0]
-                except: pass
-                r.refresh_dict()
-                seqResults.append(r)
-            #end for subseqs
-            if config.SAVE_RESULT:
-                scripts.butil.load_results.save_seq_result(seqResults)
+    def save(t, idxSeq, seqResults):
+        if config.SAVE_RESULT and len(seqResults) > 0:
+            scripts.butil.load_results.save_seq_result(seqResults)
+        if evaluators is None or len(seqResults) == 0:
+            return False
+        # The evaluator gets the results which are saved, without the
+        # segments after a failed one.
+        evaluator = evaluators[t]
+        for result in seqResults:
+            evaluator.add_result(result)
+        evaluator.finish_seq(seqs[idxSeq].name)
+        print(f'{t} : {evalType} success AUC {evaluator.auc():.3f} after '
+            f'{seqs[idxSeq].name}')
+        if evaluator.hopeless():
+            evaluator.aborted = True
+        return evaluator.aborted
 
-            trackerResults[t].append(seqResults)
-        #end for tracker
-    #end for allseqs
+    jobs = scripts.butil.scheduler.make_jobs(trackers, seqs, evalType,
+        shiftTypeSet, skip)
+    jobResults = scripts.butil.scheduler.run_jobs(jobs, numJobs, save,
+        keep_results=evaluators is None)
+    for idxSeq in range(len(seqs)):
+        s = seqs[idxSeq]
+        for t in trackers:
+            if (t, s.name) in savedResults:
+                trackerResults[t].append(savedResults[(t, s.name)])
+            elif jobResults.get((t, idxSeq)):
+                trackerResults[t].append(jobResults[(t, idxSeq)])
     return trackerResults
 
 if __name__ == "__main__":
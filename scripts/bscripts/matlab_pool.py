@@ -0,0 +1,249 @@
+"""A pool of warm MATLAB engines shared by the MATLAB-backed trackers.
+
+Starting a MATLAB engine and adding a tracker's directories to its path take
+seconds, so the adapters used to pay that cost on every sub-sequence. The pool
+keeps engines running between jobs, and each engine caches which tracker
+directories are already on its path. Jobs check an engine out, use it
+exclusively, and return it. An engine which crashed is discarded and a new
+one is started in its place.
+
+The scheduler runs the MATLAB jobs on a pool of config.MATLAB_ENGINES
+processes of their own, and runs one job at a time in each, so each process
+needs one engine, which stays warm for all the MATLAB jobs it runs.
+
+StubEngine stands in for MATLAB, so the pool and the adapters can be tried
+without a MATLAB installation.
+"""
+
+import contextlib
+import os
+import threading
+
+
+class EnginePool:
+    """A bounded pool of MATLAB engines."""
+
+    def __init__(self, size=1, start_engine=None):
+        """Create an empty pool. Engines are started on demand.
+
+        Args:
+            size: The maximum number of engines.
+            start_engine: A function which starts and returns a new engine.
+                The default starts a real MATLAB engine.
+        """
+        self.size = size
+        self._start_engine = start_engine or _start_matlab
+        self._idle = []
+        self._count = 0
+        self._front = {}
+        self._genpaths = {}
+        self._condition = threading.Condition()
+
+    def checkout(self, workdir=None):
+        """Check an engine out of the pool, waiting for one if necessary.
+
+        Args:
+            workdir: The tracker directory. If given, the directory and its
+                sub-directories are put in front of the engine's path, and it
+                becomes the engine's working directory.
+
+        Returns:
+            An engine for the exclusive use of the caller.
+        """
+        with self._condition:
+            while not self._idle and self._count >= self.size:
+                self._condition.wait()
+            if self._idle:
+                engine = self._idle.pop()
+            else:
+                self._count += 1
+                engine = None
+        if engine is None:
+            try:
+                print('Starting matlab engine...')
+                engine = self._start_engine()
+            except:
+                with self._condition:
+                    self._count -= 1
+                    self._condition.notify()
+                raise
+        if workdir is not None:
+            try:
+                self._prepare(engine, workdir)
+            except:
+                self.checkin(engine, not _is_alive(engine))
+                raise
+        return engine
+
+    def checkin(self, engine, broken=False):
+        """Return an engine to the pool.
+
+        Args:
+            engine: An engine from checkout().
+            broken: True if the engine crashed. It is shut down, and another
+                engine will be started when one is needed.
+        """
+        if broken:
+            self._discard(engine)
+            with self._condition:
+                self._count -= 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._idle.append(engine)
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def engine(self, workdir=None):
+        """Check out an engine for the duration of a with statement.
+
+        If the body raises an exception, the engine is checked for signs of
+        life. A dead engine is replaced instead of returned to the pool.
+        """
+        engine = self.checkout(workdir)
+        try:
+            yield engine
+        except:
+            self.checkin(engine, not _is_alive(engine))
+            raise
+        self.checkin(engine)
+
+    def close(self):
+        """Shut down the idle engines."""
+        with self._condition:
+            engines, self._idle = self._idle, []
+            self._count -= len(engines)
+        for engine in engines:
+            self._discard(engine)
+
+    def _prepare(self, engine, workdir):
+        if workdir not in self._genpaths:
+            self._genpaths[workdir] = engine.genpath(workdir, nargout=1)
+        if self._front.get(id(engine)) != workdir:
+            # addpath() moves folders which are already on the path to the
+            # front, so this tracker's functions shadow other trackers'.
+            engine.addpath(self._genpaths[workdir], nargout=0)
+            self._front[id(engine)] = workdir
+        engine.cd(workdir, nargout=0)
+
+    def _discard(self, engine):
+        self._front.pop(id(engine), None)
+        try:
+            engine.quit()
+        except:  # pylint: disable=bare-except
+            pass
+
+
+class StubEngine:
+    """A stand-in for a MATLAB engine.
+
+    It records the calls it receives. Tracker functions, whether called
+    directly (m.MEEMTrack(...)) or through eval(), return a result which
+    keeps the initial bounding box for every frame.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.workspace = {}
+        self.cwd = None
+        self.path = []
+        self.alive = True
+
+    def genpath(self, folder, nargout=1):  # pylint: disable=unused-argument
+        self._call('genpath', folder)
+        folders = [root for root, _, _ in os.walk(folder)]
+        return os.pathsep.join(folders)
+
+    def addpath(self, path, nargout=0):  # pylint: disable=unused-argument
+        self._call('addpath', path)
+        folders = path.split(os.pathsep)
+        self.path = folders + [x for x in self.path if x not in folders]
+
+    def cd(self, folder, nargout=0):  # pylint: disable=unused-argument,invalid-name
+        self._call('cd', folder)
+        self.cwd = folder
+
+    def eval(self, expression, nargout=0):  # pylint: disable=unused-argument
+        self._call('eval', expression)
+        if nargout == 0:
+            return None
+        return self._track(self.workspace.get('subS', {}))
+
+    def crash(self):
+        """Make the engine behave as if MATLAB died."""
+        self.alive = False
+
+    def quit(self):
+        self._call('quit')
+        self.alive = False
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def function(*args, nargout=1):  # pylint: disable=unused-argument
+            self._call(name, *args)
+            return self._track({})
+        return function
+
+    def _call(self, name, *args):
+        if not self.alive:
+            raise RuntimeError('MATLAB engine is not running')
+        self.calls.append((name,) + args)
+
+    @staticmethod
+    def _track(subS):
+        init_rect = list(subS.get('init_rect', [0, 0, 0, 0]))
+        length = subS.get('endFrame', 1) - subS.get('startFrame', 1) + 1
+        return {'res': [init_rect] * length, 'type': 'rect', 'fps': 0.0}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Get the engine pool of this process.
+
+    The pool is created on first use, with one engine, since a process runs
+    one job at a time.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EnginePool(1)
+        return _pool
+
+
+def set_pool(pool):
+    """Replace the engine pool of this process, e.g. with a pool of stubs.
+
+    Returns:
+        The previous pool, or None.
+    """
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+def double(values):
+    """Convert a list to a MATLAB double array, if MATLAB is available."""
+    try:
+        import matlab  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return values
+    return matlab.double(values)
+
+
+def _start_matlab():
+    import matlab.engine  # pylint: disable=import-outside-toplevel
+    return matlab.engine.start_matlab()
+
+
+def _is_alive(engine):
+    try:
+        engine.eval('1;', nargout=0)
+    except:  # pylint: disable=bare-except
+        return False
+    return True
@@ -0,0 +1,366 @@
+"""Long-lived worker processes for Python trackers such as py-MDNet.
+
+Running "python3 tracking/run_tracker.py" for every sub-sequence re-imports
+torch and the tracker for each job. Instead, a worker process imports the
+tracker once and then runs sequence jobs sent over a pipe.
+
+The protocol is one JSON object per line. The parent writes a job to the
+worker's stdin:
+
+    {"seq_name": "Couple_0", "img_list": [...], "init_bbox": [x, y, w, h]}
+
+and the worker answers on its stdout with one line per frame, followed by a
+summary:
+
+    {"box": [x, y, w, h], "time": 0.02}
+    ...
+    {"done": true, "frames": 140, "time": 3.2}
+
+or {"error": "..."} if the tracker raised an exception. Anything the tracker
+prints goes to stderr, so it can't corrupt the protocol. A box has a "time",
+the seconds the tracker spent on that frame, if the tracker yields the boxes
+one at a time.
+
+This module is also the worker program. It only uses the standard library, so
+it can run under the tracker's interpreter:
+
+    python3 py_worker.py --entry tracking.run_tracker:run_mdnet --pick 1
+
+The entry function is called as entry(img_list, init_bbox). It returns or
+yields the boxes; if it returns a tuple, --pick selects the boxes from it.
+With --stand-in, the worker "tracks" by repeating the initial box, which is
+useful for trying the protocol without a tracker.
+"""
+
+import atexit
+import getopt
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+class WorkerError(Exception):
+    """The worker process failed or the tracker raised an exception."""
+
+
+class TrackerWorker:
+    """The parent side of a worker process."""
+
+    def __init__(self, command, cwd=None):
+        """Describe a worker. The process starts with the first job.
+
+        Args:
+            command: The command which starts the worker program.
+            cwd: The working directory of the worker process.
+        """
+        self.command = command
+        self.cwd = cwd
+        self._process = None
+        self._lock = threading.Lock()
+
+    def track(self, seq_name, img_list, init_bbox):
+        """Run a sequence job in the worker.
+
+        Jobs are serialized; the worker runs one at a time.
+
+        Args:
+            seq_name: The name of the (sub-)sequence.
+            img_list: The image paths, one per frame.
+            init_bbox: The initial bounding box, [x, y, w, h].
+
+        Returns:
+            A tuple (boxes, seconds, frame_times). seconds is the time the
+            tracker took in the worker, without process start up. frame_times
+            are the seconds per frame, or None if the tracker doesn't yield
+            the boxes one at a time.
+
+        Raises:
+            WorkerError: The tracker raised an exception, or the worker died.
+                A dead worker is restarted by the next job.
+        """
+        job = {
+            "seq_name": seq_name,
+            "img_list": list(img_list),
+            "init_bbox": [float(x) for x in init_bbox],
+        }
+        with self._lock:
+            process = self._start()
+            try:
+                process.stdin.write(json.dumps(job) + "\n")
+                process.stdin.flush()
+                boxes = []
+                frame_times = []
+                while True:
+                    line = process.stdout.readline()
+                    if not line:
+                        raise WorkerError(f"worker exited with {process.wait()}")
+                    message = json.loads(line)
+                    if "box" in message:
+                        boxes.append(message["box"])
+                        if "time" in message:
+                            frame_times.append(message["time"])
+                    elif "error" in message:
+                        raise WorkerError(message["error"])
+                    else:
+                        if len(frame_times) != len(boxes) or not boxes:
+                            frame_times = None
+                        return boxes, message["time"], frame_times
+            except (OSError, ValueError) as error:
+                self._stop()
+                raise WorkerError(str(error)) from error
+            except WorkerError:
+                if self._process.poll() is not None:
+                    self._process = None
+                raise
+
+    def start(self):
+        """Start the worker process, if it isn't running."""
+        with self._lock:
+            self._start()
+
+    def close(self):
+        """Stop the worker process."""
+        with self._lock:
+            self._stop()
+
+    def _start(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                universal_newlines=True,
+                bufsize=1,
+            )
+        return self._process
+
+    def _stop(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def get_worker(name, command, cwd=None):
+    """Get the worker for a tracker, creating it if necessary.
+
+    Each process keeps one worker per tracker. The workers are stopped when
+    the process exits.
+    """
+    with _workers_lock:
+        worker = _workers.get(name)
+        if worker is None:
+            worker = TrackerWorker(command, cwd)
+            _workers[name] = worker
+        return worker
+
+
+def worker_command(entry, pick=None, python="python3"):
+    """Build the command which runs this module as a worker program.
+
+    Args:
+        entry: The tracker's entry function as "module:function", or None
+            for the stand-in tracker.
+        pick: If the entry function returns a tuple, the index of the boxes.
+        python: The interpreter which runs the worker.
+    """
+    command = [python, os.path.abspath(__file__)]
+    if entry is None:
+        command.append("--stand-in")
+    else:
+        command += ["--entry", entry]
+    if pick is not None:
+        command += ["--pick", str(pick)]
+    return command
+
+
+def track_sequence(name, command, cwd, sequence):
+    """Run a sequence in a tracker's worker.
+
+    Args:
+        name: The tracker name.
+        command: The command which starts the worker, from worker_command().
+        cwd: The working directory of the worker.
+        sequence: The (sub-)sequence to track.
+
+    Returns:
+        A result dictionary with 'res', 'type', 'fps', and 'timing' fields,
+        like the tracker adapters return.
+    """
+    import scripts.bscripts.timing  # pylint: disable=import-outside-toplevel
+
+    timer = scripts.bscripts.timing.Timer(len(sequence.s_frames))
+    worker = get_worker(name, command, cwd)
+    worker.start()
+    timer.lap("startup")
+    boxes, seconds, frame_times = worker.track(
+        sequence.name, sequence.s_frames, sequence.init_rect
+    )
+    timer.lap("track")
+    if frame_times is not None:
+        timer.report_frame_times(frame_times)
+    else:
+        timer.report_times(0.0, seconds)
+    return timer.finish({"res": boxes, "type": "rect"})
+
+
+def run_mdnet_style(name, sequence, repository):
+    """Run a py-MDNet style tracker on a sequence.
+
+    With config.PERSISTENT_PY_WORKERS, the sequence runs in the tracker's
+    worker. Otherwise "python3 tracking/run_tracker.py" runs in the
+    repository, with its configuration and result files in a scratch
+    directory.
+
+    Args:
+        name: The tracker name.
+        sequence: The (sub-)sequence to track.
+        repository: The tracker's repository, which has a
+            tracking/run_tracker.py with a run_mdnet() function.
+
+    Returns:
+        A result dictionary, like the tracker adapters return.
+    """
+    # pylint: disable=import-outside-toplevel
+    import config
+    import scripts.bscripts.scratch
+    import scripts.bscripts.timing
+
+    if config.PERSISTENT_PY_WORKERS:
+        command = worker_command("tracking.run_tracker:run_mdnet", pick=1)
+        return track_sequence(name, command, repository, sequence)
+    timer = scripts.bscripts.timing.Timer(sequence.len)
+    with scripts.bscripts.scratch.scratch_dir(name, sequence.name) as scratch:
+        tmp_res = os.path.join(scratch, "tmp_res.json")
+        seq_config = {}
+        seq_config["seq_name"] = sequence.name
+        seq_config["img_list"] = sequence.s_frames
+        seq_config["init_bbox"] = sequence.init_rect
+        seq_config["savefig_dir"] = ""
+        seq_config["result_path"] = tmp_res
+
+        tmp_config = os.path.join(scratch, "tmp_config.json")
+        tmp_config_file = open(tmp_config, "w")
+        json.dump(seq_config, tmp_config_file, indent=2)
+        tmp_config_file.close()
+
+        command = ["python3", "tracking/run_tracker.py", "-j", tmp_config]
+        timer.lap("startup")
+        subprocess.call(command, cwd=repository)
+        timer.lap("track")
+        res_file = open(tmp_res, "r")
+        res = json.load(res_file)
+        res_file.close()
+    timer.lap("teardown")
+    return timer.finish(res)
+
+
+@atexit.register
+def _close_workers():
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for worker in workers:
+        worker.close()
+
+
+def hold_still(img_list, init_bbox):
+    """A stand-in tracker which reports the initial box for every frame."""
+    for _ in img_list:
+        yield init_bbox
+
+
+def serve(track, pick=None, requests=None, replies=None):
+    """Run jobs from requests until it's closed.
+
+    Args:
+        track: The entry function, track(img_list, init_bbox).
+        pick: If track returns a tuple, the index of the boxes.
+        requests: The stream of jobs. The default is stdin.
+        replies: The stream for answers. The default is stdout.
+    """
+    requests = requests or sys.stdin
+    replies = replies or sys.stdout
+    for line in requests:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        tic = time.perf_counter()
+        frames = 0
+        try:
+            boxes = track(job["img_list"], job["init_bbox"])
+            if isinstance(boxes, tuple):
+                boxes = boxes[pick or 0]
+            # A generator tracks a frame each time it's advanced, so the time
+            # between boxes is the time per frame.
+            per_frame = inspect.isgenerator(boxes)
+            last = time.perf_counter()
+            for box in boxes:
+                if hasattr(box, "tolist"):
+                    box = box.tolist()
+                message = {"box": [float(x) for x in box]}
+                if per_frame:
+                    message["time"] = time.perf_counter() - last
+                replies.write(json.dumps(message))
+                replies.write("\n")
+                frames += 1
+                last = time.perf_counter()
+        except Exception as error:  # pylint: disable=broad-except
+            replies.write(json.dumps({"error": repr(error)}) + "\n")
+            replies.flush()
+            continue
+        duration = time.perf_counter() - tic
+        replies.write(
+            json.dumps({"done": True, "frames": frames, "time": duration})
+        )
+        replies.write("\n")
+        replies.flush()
+
+
+def main(argv):
+    """Run the worker program."""
+    try:
+        opts, _ = getopt.getopt(argv, "", ["entry=", "pick=", "stand-in"])
+    except getopt.GetoptError:
+        print("usage : py_worker.py --entry <module:function> [--pick <n>]"
+            + " | --stand-in", file=sys.stderr)
+        sys.exit(1)
+    entry = None
+    pick = None
+    for opt, arg in opts:
+        if opt == "--entry":
+            entry = arg
+        elif opt == "--pick":
+            pick = int(arg)
+        elif opt == "--stand-in":
+            entry = None
+
+    # Keep the real stdout for the protocol, and send everything else the
+    # tracker prints, including output from C extensions, to stderr.
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    if entry is None:
+        track = hold_still
+    else:
+        sys.path.insert(0, os.getcwd())
+        module_name, function_name = entry.split(":")
+        track = getattr(importlib.import_module(module_name), function_name)
+    serve(track, pick, sys.stdin, replies)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,167 @@
+"""Registry of tracker adapters.
+
+Trackers are dispatched by name through this registry instead of evaluating a
+"scripts.bscripts.run_X.run_X(...)" string. Adapter modules are imported the
+first time a tracker is used, and the run functions are cached, so dispatching
+a job is a dictionary lookup.
+
+Each tracker also has metadata which the scheduler uses to place jobs.
+"""
+
+import collections
+import importlib
+import threading
+
+TrackerInfo = collections.namedtuple(
+    "TrackerInfo",
+    [
+        "name",
+        "module",
+        "result_type",
+        "needs_matlab",
+        "thread_safe",
+        "group",
+        "max_jobs",
+    ],
+)
+TrackerInfo.__doc__ = """Metadata about a tracker adapter.
+
+name: The tracker name, as used on the command line and in result paths.
+module: The adapter module. It defines the function run_<name>.
+result_type: The result type the tracker reports, such as 'rect' or 'ivtAff'.
+    None if the type is only known from the tracker's output.
+needs_matlab: True if the tracker runs in a MATLAB engine.
+thread_safe: True if several runs can share one process at the same time.
+group: Trackers which share an engine or files are put in the same group.
+    None if the tracker doesn't share anything with other trackers.
+max_jobs: The maximum number of concurrent jobs for the tracker, or for its
+    group. None if only the size of the worker pool limits the tracker.
+"""
+
+_REGISTRY = {}
+_FUNCTIONS = {}
+_LOCK = threading.Lock()
+
+
+def register(
+    name,
+    result_type=None,
+    needs_matlab=False,
+    thread_safe=True,
+    group=None,
+    max_jobs=None,
+    module=None,
+):
+    """Register a tracker adapter.
+
+    Args:
+        name: The tracker name.
+        result_type: The result type the tracker reports.
+        needs_matlab: True if the tracker runs in a MATLAB engine.
+        thread_safe: True if several runs can share one process at once.
+        group: The name of a group of trackers which share resources.
+        max_jobs: The maximum number of concurrent jobs for the tracker or
+            its group.
+        module: The adapter module. The default is scripts.bscripts.run_<name>.
+
+    Returns:
+        The new TrackerInfo.
+    """
+    if module is None:
+        module = f"scripts.bscripts.run_{name}"
+    info = TrackerInfo(
+        name, module, result_type, needs_matlab, thread_safe, group, max_jobs
+    )
+    with _LOCK:
+        _REGISTRY[name] = info
+        _FUNCTIONS.pop(name, None)
+    return info
+
+
+def get_info(name):
+    """Get the metadata for a tracker.
+
+    Trackers which are not registered get default metadata, with the adapter
+    module found by the scripts.bscripts.run_<name> naming convention.
+
+    Args:
+        name: The tracker name.
+
+    Returns:
+        A TrackerInfo.
+    """
+    info = _REGISTRY.get(name)
+    if info is None:
+        info = TrackerInfo(
+            name, f"scripts.bscripts.run_{name}", None, False, True, None, None
+        )
+    return info
+
+
+def get_tracker(name):
+    """Get the run function for a tracker.
+
+    The adapter module is imported on first use, and the function is cached.
+
+    Args:
+        name: The tracker name.
+
+    Returns:
+        The function run_<name>(seq, rp, bSaveImage, workdir).
+
+    Raises:
+        ImportError: The adapter module can't be imported.
+        AttributeError: The adapter module doesn't define run_<name>.
+    """
+    function = _FUNCTIONS.get(name)
+    if function is None:
+        with _LOCK:
+            function = _FUNCTIONS.get(name)
+            if function is None:
+                module = importlib.import_module(get_info(name).module)
+                function = getattr(module, f"run_{name}")
+                _FUNCTIONS[name] = function
+    return function
+
+
+def names():
+    """Get the names of all the registered trackers."""
+    return sorted(_REGISTRY)
+
+
+# The executables write their files to per-job scratch directories, see
+# scripts.bscripts.scratch, so several jobs of one tracker can run at once.
+for _name in [
+    "BSBT",
+    "CPF",
+    "CXT",
+    "Frag",
+    "KMS",
+    "LSK",
+    "MIL",
+    "OAB",
+    "SBT",
+    "SMS",
+    "Struck",
+]:
+    register(_name, result_type="rect")
+for _name, _type in [
+    ("ASLA", "ivtAff"),
+    ("CT", "rect"),
+    ("DFT", "rect"),
+    ("IVT", "ivtAff"),
+    ("L1APG", "L1Aff"),
+    ("LOT", "rect"),
+    ("MEEM", "rect"),
+    ("MTT", "L1Aff"),
+    ("MUSTer", "rect"),
+    ("ORIA", None),
+    ("SCM", "ivtAff"),
+    ("TLD", "rect"),
+]:
+    # Jobs check engines out of scripts.bscripts.matlab_pool. Each worker
+    # process has its own engines, so the group has no limit across the
+    # pool; a global limit can be set in config.TRACKER_JOB_LIMITS.
+    register(_name, result_type=_type, needs_matlab=True, group="matlab")
+for _name in ["MDNet", "igt", "dmdnet"]:
+    register(_name, result_type="rect")
@@ -1,31 +1,34 @@
 import subprocess
-import time
 import numpy as np
 from config import *
+import scripts.bscripts.scratch
+import scripts.bscripts.timing
 
-def run_BSBT(seq, rp, bSaveImage):
+def run_BSBT(seq, rp, bSaveImage, workdir):
     x = seq.init_rect[0] - 1
     y = seq.init_rect[1] - 1
     w = seq.init_rect[2]
     h = seq.init_rect[3]
 
-    path = './results/'
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    with scripts.bscripts.scratch.scratch_dir('BSBT', seq.name) as scratch:
+        # The tracker writes <name>_BSBT.txt in its working directory.
+        name = os.path.basename(scratch)
+        exe = os.path.join(workdir, 'BeyondSemiBoostingTracker.exe')
+        command = map(str,[exe, '100', '0.99', '2', 
+            '0', '0', '0', name, seq.path, seq.startFrame, seq.endFrame, 
+            seq.nz, seq.ext, x, y, w, h])
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+        timer.lap('startup')
+        subprocess.call(command, cwd=workdir)
+        timer.lap('track')
 
-    command = map(str,['BeyondSemiBoostingTracker.exe', '100', '0.99', '2', 
-        '0', '0', '0', seq.name, seq.path, seq.startFrame, seq.endFrame, 
-        seq.nz, seq.ext, x, y, w, h])
+        result = dict()
+        output = scripts.bscripts.scratch.take_output(
+            os.path.join(workdir, '{0}_BSBT.txt'.format(name)), scratch)
+        res = np.loadtxt(output, dtype=int)
+        result['res'] = res.tolist()
+        result['type'] = 'rect'
 
-    tic = time.clock()
-    subprocess.call(command)
-    duration = time.clock() - tic
-
-    result = dict()
-    res = np.loadtxt('{0}_BSBT.txt'.format(seq.name), dtype=int)
-    result['res'] = res.tolist()
-    result['type'] = 'rect'
-    result['fps'] = round(seq.len / duration, 3)
-
-    return result
\ No newline at end of file
+    timer.lap('teardown')
+    return timer.finish(result)
\ No newline at end of file
@@ -1,30 +1,31 @@
 import subprocess
-import time
 import numpy as np
 from config import *
+import scripts.bscripts.scratch
+import scripts.bscripts.timing
 
-def run_CPF(seq, rp, bSaveImage):
+def run_CPF(seq, rp, bSaveImage, workdir):
     x = seq.init_rect[0] - 1
     y = seq.init_rect[1] - 1
     w = seq.init_rect[2]
     h = seq.init_rect[3]
 
-    path = './results/'
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    with scripts.bscripts.scratch.scratch_dir('CPF', seq.name) as scratch:
+        path = os.path.join(scratch, '')
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+        exe = os.path.join(workdir, 'ObjTrk.exe')
+        command = map(str,[exe, '1', path , seq.name, seq.path,
+            seq.startFrame, seq.endFrame, seq.nz, seq.ext, x, y, w, h])
 
-    command = map(str,['ObjTrk.exe', '1', path , seq.name, seq.path,
-        seq.startFrame, seq.endFrame, seq.nz, seq.ext, x, y, w, h])
+        timer.lap('startup')
+        subprocess.call(command, cwd=workdir)
+        timer.lap('track')
 
-    tic = time.clock()
-    subprocess.call(command)
-    duration = time.clock() - tic
+        result = dict()
+        res = np.loadtxt(path + '{0}_CPF.txt'.format(seq.name), dtype=int)
+        result['res'] = res.tolist()
+        result['type'] = 'rect'
 
-    result = dict()
-    res = np.loadtxt(path + '{0}_CPF.txt'.format(seq.name), dtype=int)
-    result['res'] = res.tolist()
-    result['type'] = 'rect'
-    result['fps'] = round(seq.len / duration, 3)
-
-    return result
\ No newline at end of file
+    timer.lap('teardown')
+    return timer.finish(result)
\ No newline at end of file
@@ -1,26 +1,34 @@
 import subprocess
-import time
 import numpy as np
 from config import *
+import scripts.bscripts.scratch
+import scripts.bscripts.timing
 
-def run_Frag(seq, rp, bSaveImage):
+def run_Frag(seq, rp, bSaveImage, workdir):
     x = seq.init_rect[0] - 1
     y = seq.init_rect[1] - 1
     w = seq.init_rect[2]
     h = seq.init_rect[3]
 
-    command = map(str,['fragtrack.exe', '25', '16', '3', '0', '0',
-        seq.name, seq.path, seq.startFrame, seq.endFrame, \
-        seq.nz, seq.ext, x, y, w, h])
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    with scripts.bscripts.scratch.scratch_dir('Frag', seq.name) as scratch:
+        # The tracker writes <name>_Frag.txt in its working directory.
+        name = os.path.basename(scratch)
+        exe = os.path.join(workdir, 'fragtrack.exe')
+        command = map(str,[exe, '25', '16', '3', '0', '0',
+            name, seq.path, seq.startFrame, seq.endFrame, \
+            seq.nz, seq.ext, x, y, w, h])
 
-    tic = time.clock()
-    subprocess.call(command)
-    duration = time.clock() - tic
+        timer.lap('startup')
+        subprocess.call(command, cwd=workdir)
+        timer.lap('track')
 
-    result = dict()
-    res = np.loadtxt('{0}_Frag.txt'.format(seq.name), dtype=int)
-    result['res'] = res.tolist()
-    result['type'] = 'rect'
-    result['fps'] = round(seq.len / duration, 3)
+        result = dict()
+        output = scripts.bscripts.scratch.take_output(
+            os.path.join(workdir, '{0}_Frag.txt'.format(name)), scratch)
+        res = np.loadtxt(output, dtype=int)
+        result['res'] = res.tolist()
+        result['type'] = 'rect'
 
-    return result
\ No newline at end of file
+    timer.lap('teardown')
+    return timer.finish(result)
\ No newline at end of file
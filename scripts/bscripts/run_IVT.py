@@ -1,18 +1,20 @@
 from config import *
 import scripts.butil
+import scripts.bscripts.matlab_pool
+import scripts.bscripts.timing
 
-def run_IVT(seq, rp, bSaveImage):
-    global m
-    if m == None:
-        print 'Starting matlab engine...'
-        m = matlab.engine.start_matlab()
-    m.addpath(m.genpath('.', nargout=1), nargout=0)
-    seq.init_rect = matlab.double(seq.init_rect)
-    m.workspace['subS'] = seq.__dict__
-    m.workspace['rp'] = os.path.abspath(rp)
-    m.workspace['bSaveImage'] = bSaveImage
-    func = 'run_IVT(subS, rp, bSaveImage);'
-    res = m.eval(func, nargout=1)
+def run_IVT(seq, rp, bSaveImage, workdir):
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    pool = scripts.bscripts.matlab_pool.get_pool()
+    with pool.engine(workdir) as m:
+        seq.init_rect = scripts.bscripts.matlab_pool.double(seq.init_rect)
+        m.workspace['subS'] = seq.to_dict()
+        m.workspace['rp'] = os.path.abspath(rp)
+        m.workspace['bSaveImage'] = bSaveImage
+        func = 'run_IVT(subS, rp, bSaveImage);'
+        timer.lap('startup')
+        res = m.eval(func, nargout=1)
+        timer.lap('track')
     res['res'] = scripts.butil.matlab_double_to_py_float(res['res'])
-    # m.quit()
-    return res
+    timer.lap('teardown')
+    return timer.finish(res)
@@ -1,17 +1,17 @@
 from config import *
-import time
 import scripts.butil
+import scripts.bscripts.matlab_pool
+import scripts.bscripts.timing
 
-def run_MEEM(seq, rp, bSaveImage):
-    global m
-
-    if m == None:
-        print 'Starting matlab engine...'
-        m = matlab.engine.start_matlab()
-    
-    m.addpath(m.genpath('.', nargout=1), nargout=0)
-    seq.init_rect = matlab.double(seq.init_rect)
-    res = m.MEEMTrack(seq.path, seq.nz, seq.ext, bSaveImage, seq.init_rect, seq.startFrame,
-        seq.endFrame)
+def run_MEEM(seq, rp, bSaveImage, workdir):
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    pool = scripts.bscripts.matlab_pool.get_pool()
+    with pool.engine(workdir) as m:
+        seq.init_rect = scripts.bscripts.matlab_pool.double(seq.init_rect)
+        timer.lap('startup')
+        res = m.MEEMTrack(seq.path, seq.nz, seq.ext, bSaveImage, seq.init_rect,
+            seq.startFrame, seq.endFrame)
+        timer.lap('track')
     res['res'] = scripts.butil.matlab_double_to_py_float(res['res'])
-    return res
+    timer.lap('teardown')
+    return timer.finish(res)
@@ -1,24 +1,23 @@
 from config import *
-import time
 import scripts.butil
+import scripts.bscripts.matlab_pool
+import scripts.bscripts.timing
 
-def run_MUSTer(seq, rp, bSaveImage):
-    global m
+def run_MUSTer(seq, rp, bSaveImage, workdir):
+    timer = scripts.bscripts.timing.Timer(seq.len)
     source = dict()
     source['n_frames'] = seq.len
     source['video_path'] = seq.path
     img_files = sorted([x for x in os.listdir(seq.path) if x.endswith(seq.ext)])
     source['img_files'] = img_files[seq.startFrame-1:seq.endFrame]
-    if m == None:
-        print 'Starting matlab engine...'
-        m = matlab.engine.start_matlab()
-    m.addpath(m.genpath('.', nargout=1), nargout=0)
-    seq.init_rect = matlab.double(seq.init_rect)
-    tic = time.clock()
-    bboxes = m.MUSTer_tracking(source, seq.init_rect, nargout=1)
-    duration = time.clock() - tic
+    pool = scripts.bscripts.matlab_pool.get_pool()
+    with pool.engine(workdir) as m:
+        seq.init_rect = scripts.bscripts.matlab_pool.double(seq.init_rect)
+        timer.lap('startup')
+        bboxes = m.MUSTer_tracking(source, seq.init_rect, nargout=1)
+        timer.lap('track')
     res = dict()
     res['res'] = scripts.butil.matlab_double_to_py_float(bboxes)
     res['type'] = 'rect'
-    res['fps'] = round(seq.len / duration, 3)
-    return res
+    timer.lap('teardown')
+    return timer.finish(res)
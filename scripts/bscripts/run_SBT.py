@@ -1,57 +1,58 @@
 import subprocess
-import time
 import numpy as np
 from config import *
+import scripts.bscripts.scratch
+import scripts.bscripts.timing
 
-def run_SBT(seq, rp, bSaveImage):
+def run_SBT(seq, rp, bSaveImage, workdir):
     x = seq.init_rect[0] - 1
     y = seq.init_rect[1] - 1
     w = seq.init_rect[2]
     h = seq.init_rect[3]
 
-    path = './results/'
-
-    cfgfile = open('config.txt', 'w')
-    cfgstr = \
-        '% tracking with on-line boosting\n' + \
-        'version 0.3\n\n' + \
-        '% source options: USB, AVI, IMAGES\n' + \
-        'source = IMAGES\n' + \
-        '% only if source is AVI OR IMAGES\n' + \
-        'directory = %s\n\n' % (seq.path) + \
-        '% write debug information\n' + \
-        'debug = true\n' + \
-        'saveDir = %s\n\n' % (path) + \
-        '% classifier (boosting)\n' + \
-        'numSelectors = 100\n\n' + \
-        '% search region (size and resolution)\n' + \
-        'overlap = 0.99\n' + \
-        'searchFactor = 2\n\n' + \
-        '%initialization bounding box: MOUSE or COORDINATES\n' + \
-        'initBB = COORDINATES\n\n' + \
-        '%if COORDINATES bb = x y width height\n' + \
-        'bb = %d %d %d %d\n' % (x, y, w, h)
-
-    cfgfile.write(cfgstr)
-    cfgfile.close()
-
-    if not os.path.exists(path):
-        os.makedirs(path)
-
-    command = map(str,['SemiBoostingTracker_b.exe', '100', '0.99', '2', 
-        '0', '0', '0', seq.name, seq.path, seq.startFrame, seq.endFrame, 
-        seq.nz, seq.ext, x, y, w, h])
-
-    # command = ['SemiBoostingTracker1.exe']
-
-    tic = time.clock()
-    subprocess.call(command)
-    duration = time.clock() - tic
-
-    result = dict()
-    res = np.loadtxt(path + '{0}_SBT.txt'.format(seq.name), dtype=int)
-    result['res'] = res.tolist()
-    result['type'] = 'rect'
-    result['fps'] = round(seq.len / duration, 3)
-
-    return result
\ No newline at end of file
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    with scripts.bscripts.scratch.scratch_dir('SBT', seq.name) as scratch:
+        path = os.path.join(scratch, '')
+
+        cfgfile = open(os.path.join(scratch, 'config.txt'), 'w')
+        cfgstr = \
+            '% tracking with on-line boosting\n' + \
+            'version 0.3\n\n' + \
+            '% source options: USB, AVI, IMAGES\n' + \
+            'source = IMAGES\n' + \
+            '% only if source is AVI OR IMAGES\n' + \
+            'directory = %s\n\n' % (seq.path) + \
+            '% write debug information\n' + \
+            'debug = true\n' + \
+            'saveDir = %s\n\n' % (path) + \
+            '% classifier (boosting)\n' + \
+            'numSelectors = 100\n\n' + \
+            '% search region (size and resolution)\n' + \
+            'overlap = 0.99\n' + \
+            'searchFactor = 2\n\n' + \
+            '%initialization bounding box: MOUSE or COORDINATES\n' + \
+            'initBB = COORDINATES\n\n' + \
+            '%if COORDINATES bb = x y width height\n' + \
+            'bb = %d %d %d %d\n' % (x, y, w, h)
+
+        cfgfile.write(cfgstr)
+        cfgfile.close()
+
+        exe = os.path.join(workdir, 'SemiBoostingTracker_b.exe')
+        command = map(str,[exe, '100', '0.99', '2', 
+            '0', '0', '0', seq.name, seq.path, seq.startFrame, seq.endFrame, 
+            seq.nz, seq.ext, x, y, w, h])
+
+        # command = [os.path.join(workdir, 'SemiBoostingTracker1.exe')]
+
+        timer.lap('startup')
+        subprocess.call(command, cwd=scratch)
+        timer.lap('track')
+
+        result = dict()
+        res = np.loadtxt(path + '{0}_SBT.txt'.format(seq.name), dtype=int)
+        result['res'] = res.tolist()
+        result['type'] = 'rect'
+
+    timer.lap('teardown')
+    return timer.finish(result)
\ No newline at end of file
@@ -1,31 +1,39 @@
 import subprocess
-import time
 import numpy as np
 from config import *
+import scripts.bscripts.scratch
+import scripts.bscripts.timing
 
-def run_Struck(seq, rp, bSaveImage):
+def run_Struck(seq, rp, bSaveImage, workdir):
     x = seq.init_rect[0] - 1
     y = seq.init_rect[1] - 1
     w = seq.init_rect[2]
     h = seq.init_rect[3]
 
-    path = './results/'
+    timer = scripts.bscripts.timing.Timer(seq.len)
+    with scripts.bscripts.scratch.scratch_dir('Struck', seq.name) as scratch:
+        # struck.exe writes results/<name>_ST.txt in its working directory.
+        name = os.path.basename(scratch)
+        path = os.path.join(workdir, 'results', '')
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+        if not os.path.exists(path):
+            os.makedirs(path, exist_ok=True)
 
-    command = map(str,['struck.exe', 'haar', 'gaussian', '0.2', '100', '100',
-        '30', '10', bSaveImage, bSaveImage, seq.name, seq.path, seq.startFrame,
-        seq.endFrame, seq.nz, seq.ext, x, y, w, h])
+        exe = os.path.join(workdir, 'struck.exe')
+        command = map(str,[exe, 'haar', 'gaussian', '0.2', '100', '100',
+            '30', '10', bSaveImage, bSaveImage, name, seq.path,
+            seq.startFrame, seq.endFrame, seq.nz, seq.ext, x, y, w, h])
 
-    tic = time.clock()
-    subprocess.call(command)
-    duration = time.clock() - tic
+        timer.lap('startup')
+        subprocess.call(command, cwd=workdir)
+        timer.lap('track')
 
-    result = dict()
-    res = np.loadtxt(path + '{0}_ST.txt'.format(seq.name), dtype=int)
-    result['res'] = res.tolist()
-    result['type'] = 'rect'
-    result['fps'] = round(seq.len / duration, 3)
+        result = dict()
+        output = scripts.bscripts.scratch.take_output(
+            path + '{0}_ST.txt'.format(name), scratch)
+        res = np.loadtxt(output, dtype=int)
+        result['res'] = res.tolist()
+        result['type'] = 'rect'
 
-    return result
\ No newline at end of file
+    timer.lap('teardown')
+    return timer.finish(result)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Per-job scratch directories for the external trackers.
+
+Many tracker executables write their configuration and results to fixed file
+names, in their own directory or in the working directory. Two jobs for the
+same tracker would overwrite each other's files. Instead, each job gets a
+fresh scratch directory for its configuration and its outputs. The trackers
+still run in their own directory, where they find their data files. Those
+which write their results next to the working directory are given the scratch
+directory's name as the sequence name, so their files don't collide, and
+take_output() moves the files into the scratch directory. The directory is
+removed when the job is done.
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+
+import config
+
+
+@contextlib.contextmanager
+def scratch_dir(tracker, seq_name):
+    """Create a scratch directory for the duration of a with statement.
+
+    The directory and everything in it are removed when the with statement
+    ends, even if it raises an exception.
+
+    Args:
+        tracker: The tracker name. It is part of the directory name.
+        seq_name: The (sub-)sequence name. It is part of the directory name.
+
+    Yields:
+        The absolute path of the new, empty directory. It is unique, even
+        across processes.
+    """
+    parent = config.SCRATCH_SRC
+    if parent is not None:
+        parent = os.path.abspath(parent)
+        os.makedirs(parent, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=f"{tracker}_{seq_name}_", dir=parent)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def take_output(path, scratch):
+    """Move a file which a tracker wrote elsewhere into a scratch directory.
+
+    Args:
+        path: The path of the file.
+        scratch: The scratch directory, as scratch_dir() yields it.
+
+    Returns:
+        The new path of the file, which is removed with the directory.
+
+    Raises:
+        OSError: The file doesn't exist.
+    """
+    return shutil.move(path, os.path.join(scratch, os.path.basename(path)))
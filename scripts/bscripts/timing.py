@@ -0,0 +1,132 @@
+"""Wall-clock timing of tracker runs.
+
+The adapters used to time the whole run with time.clock(), which measured CPU
+time, was removed in Python 3.8, and counted process start up, writing
+configuration files, and reading results as tracking time. A Timer measures
+the phases of a run separately with time.perf_counter():
+
+startup: Everything before the tracker sees the first frame, such as starting
+    a process or checking out a MATLAB engine, and writing configuration.
+init: The tracker's initialization on the first frame.
+track: Tracking the remaining frames.
+teardown: Everything after tracking, such as reading and converting results.
+
+An executable is timed as a whole, so its time is counted as tracking unless
+the tracker reports its own timing. Reported timing replaces the measured
+init and track times, and the rest of the measured time is counted as start
+up overhead.
+"""
+
+import collections
+import contextlib
+import time
+
+PHASES = ("startup", "init", "track", "teardown")
+
+
+class Timer:
+    """The phase times of one tracker run."""
+
+    def __init__(self, frames):
+        """Start the clock, with all phases at zero.
+
+        Args:
+            frames: The number of frames in the (sub-)sequence.
+        """
+        self.frames = frames
+        self.seconds = collections.OrderedDict((p, 0.0) for p in PHASES)
+        self.frame_times = None
+        self.reported_fps = None
+        self.reported = False
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        """Add the time since the previous lap, or the start, to a phase."""
+        now = time.perf_counter()
+        self.seconds[name] += now - self._last
+        self._last = now
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the duration of a with statement to a phase."""
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.seconds[name] += self._last - tic
+
+    def report_frame_times(self, frame_times):
+        """Use per-frame times reported by the tracker.
+
+        Args:
+            frame_times: The seconds the tracker spent on each frame. The
+                first frame is the initialization.
+        """
+        frame_times = [float(t) for t in frame_times]
+        if not frame_times:
+            return
+        self.report_times(frame_times[0], sum(frame_times[1:]))
+        self.frame_times = frame_times
+
+    def report_fps(self, fps):
+        """Use the frame rate reported by the tracker.
+
+        Trackers which report a frame rate usually leave initialization out,
+        so the reported time is counted as tracking.
+        """
+        fps = float(fps)
+        if fps <= 0:
+            return
+        self.report_times(0.0, self.frames / fps)
+        self.reported_fps = fps
+
+    def report_times(self, init, track):
+        """Use initialization and tracking times reported by the tracker.
+
+        The measured init and track times which the reported times don't
+        account for are counted as start up overhead.
+        """
+        measured = self.seconds["init"] + self.seconds["track"]
+        self.seconds["startup"] += max(measured - init - track, 0.0)
+        self.seconds["init"] = init
+        self.seconds["track"] = track
+        self.reported = True
+
+    @property
+    def fps(self):
+        """The tracking throughput, without start up and teardown."""
+        if self.reported_fps is not None:
+            return round(self.reported_fps, 3)
+        seconds = self.seconds["init"] + self.seconds["track"]
+        if seconds <= 0:
+            return 0.0
+        return round(self.frames / seconds, 3)
+
+    def to_dict(self):
+        """Get the timing breakdown to store in a Result."""
+        timing = collections.OrderedDict(
+            (p, round(s, 6)) for p, s in self.seconds.items()
+        )
+        timing["frames"] = self.frames
+        timing["source"] = "tracker" if self.reported else "wall"
+        if self.frame_times is not None:
+            timing["frameTimes"] = [round(t, 6) for t in self.frame_times]
+        return timing
+
+    def finish(self, result):
+        """Set the 'fps' and 'timing' fields of an adapter's result.
+
+        Args:
+            result: The result dictionary of an adapter. If it has a 'fps'
+                field from the tracker, and no timing was reported yet, it is
+                used as the reported frame rate.
+
+        Returns:
+            The result dictionary.
+        """
+        if not self.reported and result.get("fps"):
+            self.report_fps(result["fps"])
+        result["fps"] = self.fps
+        result["timing"] = self.to_dict()
+        return result
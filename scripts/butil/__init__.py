@@ -10,10 +10,10 @@ import math
 #from calc_rect_center import *
 
 def d_to_f(x):
-    return map(lambda o:round(float(o),4), x)
+    return [round(float(o),4) for o in x]
 
 def matlab_double_to_py_float(double):
-    return map(d_to_f, double)
+    return [d_to_f(x) for x in double]
 
 def ssd(x, y):
     if len(x) != len(y):
@@ -0,0 +1,102 @@
+"""The OTB sequence attributes, and their bitmask encoding.
+
+A sequence's attributes are stored as an integer, with bit i set if the
+sequence has the attribute NAMES[i].
+"""
+
+import numpy as np
+
+# The attributes in the order of attr_desc.txt
+NAMES = ('IV', 'SV', 'OCC', 'DEF', 'MB', 'FM', 'IPR', 'OPR', 'OV', 'BC', 'LR')
+
+BITS = dict((name, 1 << i) for i, name in enumerate(NAMES))
+
+
+def to_mask(attributes):
+    """Encode a list of attribute names as a bitmask.
+
+    Names which are not OTB attributes are ignored.
+    """
+    mask = 0
+    for name in attributes:
+        mask |= BITS.get(name.strip(), 0)
+    return mask
+
+
+def from_mask(mask):
+    """Decode a bitmask as a list of attribute names, in NAMES order."""
+    return [name for name in NAMES if mask & BITS[name]]
+
+
+class AttributeIndex:
+    """The attributes of a list of sequences, for selecting subsets of them.
+
+    Each sequence's attributes are a bitmask, and each attribute has the
+    array of the indices of its sequences, so selecting the sequences of an
+    attribute, or of a combination such as "OCC AND FM", doesn't scan the
+    attribute lists.
+    """
+
+    def __init__(self, seqs):
+        """Index the attributes of sequences.
+
+        Args:
+            seqs: The sequences. Selections are indices into this list.
+        """
+        # Attributes which are not OTB attributes get the next bits.
+        self.bits = dict(BITS)
+        masks = []
+        for seq in seqs:
+            mask = 0
+            for name in seq.attributes:
+                name = name.strip()
+                if name not in self.bits:
+                    self.bits[name] = 1 << len(self.bits)
+                mask |= self.bits[name]
+            masks.append(mask)
+        self.masks = np.array(masks, dtype=object if len(self.bits) > 63
+            else np.int64)
+        self.indices = dict((name, np.flatnonzero(self.masks & bit))
+            for name, bit in self.bits.items())
+        self._selections = {}
+
+    def select(self, expression):
+        """Get the indices of the sequences which match an expression.
+
+        Args:
+            expression: 'ALL', an attribute name such as 'OCC', or names
+                joined by AND and OR, such as 'OCC AND FM'. AND binds more
+                tightly than OR.
+
+        Returns:
+            A sorted array of sequence indices.
+        """
+        key = expression.strip().upper()
+        selection = self._selections.get(key)
+        if selection is None:
+            selection = self._select(key)
+            self._selections[key] = selection
+        return selection
+
+    def _select(self, key):
+        if key == 'ALL':
+            return np.arange(len(self.masks))
+        matches = np.zeros(len(self.masks), dtype=bool)
+        for term in key.split(' OR '):
+            bits = [self._bit(name.strip()) for name in term.split(' AND ')]
+            # A name which no sequence has matches nothing.
+            if all(bits):
+                mask = 0
+                for bit in bits:
+                    mask |= bit
+                matches |= (self.masks & mask) == mask
+        return np.flatnonzero(matches)
+
+    def _bit(self, name):
+        # The expression is upper case; attribute names may not be.
+        if name in self.bits:
+            return self.bits[name]
+        for known, bit in self.bits.items():
+            if known.upper() == name:
+                return bit
+        return 0
@@ -0,0 +1,160 @@
+"""Confidence intervals and significance tests of tracker scores.
+
+An attribute's score is the mean of its sequences' success and precision
+curves, and the trackers are ranked by it. Whether a gap between two trackers
+is real depends on how much the score changes with the choice of sequences,
+which the scores alone don't show. From the curve of each sequence:
+
+    bootstrap   The sequences are drawn with replacement, numResamples times,
+                and the score is computed for each draw. The middle confidence
+                of the scores are the confidence band of the curve. All the
+                trackers use the same draws.
+    sign flip   The test of two trackers on the same sequences. If they were
+                equally good, the difference of their per-sequence scores
+                would be as likely to be negative as positive, so the signs of
+                the differences are flipped at random, numPermutations times.
+                The p-value is the fraction of flips whose mean difference is
+                at least as large as the real one.
+
+A draw is stored as the number of times each sequence is drawn, so the scores
+of all the draws and trackers are a single matrix product, and the flips are
+one, too.
+"""
+
+import numpy as np
+
+import config
+
+# The chunk of flips tested at once, which bounds the memory of the test
+_FLIP_CHUNK = 1000
+
+
+def resample_counts(numSeqs, numResamples, rng):
+    """Draw sequences with replacement.
+
+    Args:
+        numSeqs: The number of sequences.
+        numResamples: The number of draws.
+        rng: A numpy.random.Generator.
+
+    Returns:
+        A (numResamples, numSeqs) array of how often each draw has each
+        sequence. Each row adds up to numSeqs.
+    """
+    draws = rng.integers(0, numSeqs, size=(numResamples, numSeqs))
+    draws += np.arange(numResamples)[:, None] * numSeqs
+    return np.bincount(draws.ravel(),
+        minlength=numResamples * numSeqs).reshape(numResamples, numSeqs)
+
+
+def confidence_bands(curves, counts, confidence=0.95):
+    """Get the bootstrap confidence bands of mean curves.
+
+    Args:
+        curves: A (trackers, sequences, thresholds) array of per-sequence
+            curves.
+        counts: The draws, as resample_counts() returns them.
+        confidence: The fraction of the draws inside the band.
+
+    Returns:
+        A tuple (lower, upper) of (trackers, thresholds) arrays.
+    """
+    means = np.matmul(counts.astype(np.float64), curves) / counts.shape[1]
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(means, [alpha, 1 - alpha], axis=1)
+    return lower, upper
+
+
+def sign_flip_pvalues(values, numPermutations, rng):
+    """Test the differences of trackers' mean scores on the same sequences.
+
+    Args:
+        values: A (trackers, sequences) array of per-sequence scores.
+        numPermutations: The number of random sign flips.
+        rng: A numpy.random.Generator.
+
+    Returns:
+        A (trackers, trackers) array of two-sided p-values. Item [i, j] is the
+        p-value of the difference between trackers i and j.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    numSeqs = values.shape[1]
+    observed = values.mean(axis=1)
+    observed = np.abs(observed[:, None] - observed[None, :])
+    # A flip of the difference of two trackers is the difference of the
+    # flips of each one.
+    exceed = np.zeros(observed.shape, dtype=np.int64)
+    for start in range(0, numPermutations, _FLIP_CHUNK):
+        size = min(_FLIP_CHUNK, numPermutations - start)
+        signs = rng.integers(0, 2, size=(size, numSeqs)) * 2.0 - 1
+        flipped = np.matmul(signs, values.T) / numSeqs
+        diff = np.abs(flipped[:, :, None] - flipped[:, None, :])
+        exceed += np.count_nonzero(diff >= observed - 1e-12, axis=0)
+    return (exceed + 1) / float(numPermutations + 1)
+
+
+def add_confidence(trackerScores, trackerCurves,
+    numResamples=config.BOOTSTRAP_RESAMPLES,
+    numPermutations=config.PERMUTATIONS, confidence=config.CONFIDENCE):
+    """Set the confidence bands and p-values of trackers' scores.
+
+    For each attribute, successRateCI and precisionCI of each tracker's
+    Score are set to [lower, upper], lists like successRateList and
+    precisionList. pValues maps each other tracker to the p-values of the
+    differences of the success AUC and of the precision at 20 pixels,
+    {'success': p, 'precision': p}. Only the attribute's sequences which
+    have curves for all the trackers are used; if there are none, or a
+    tracker has no score for the attribute, its scores are left as they are.
+
+    Args:
+        trackerScores: A dictionary mapping trackers to lists of
+            scripts.model.score.Score objects, as calc_result() returns them.
+        trackerCurves: A dictionary mapping trackers to dictionaries, which
+            map the names of the sequences the tracker has results for to
+            their curves, as calc_seq_curves() returns them.
+        numResamples: The number of bootstrap draws; with 0, nothing is set.
+        numPermutations: The number of sign flips of each test.
+        confidence: The fraction of the draws inside the bands.
+    """
+    trackers = list(trackerScores)
+    if not trackers or numResamples <= 0:
+        return
+    errors = list(config.thresholdSetError)
+    precisionIndex = errors.index(20) if 20 in errors else len(errors) - 1
+    for attr in trackerScores[trackers[0]]:
+        scores = [_find_score(trackerScores[t], attr.name) for t in trackers]
+        names = [name for name in attr.seqs
+            if all(name in trackerCurves[t] for t in trackers)]
+        if not names or any(s is None for s in scores):
+            continue
+        successRates = np.array([[trackerCurves[t][name][0]
+            for name in names] for t in trackers], dtype=np.float64)
+        precisions = np.array([[trackerCurves[t][name][1]
+            for name in names] for t in trackers], dtype=np.float64)
+        # The same seed for each attribute, so adding an attribute or a
+        # tracker doesn't change the draws of the others.
+        rng = np.random.default_rng(config.BOOTSTRAP_SEED)
+        counts = resample_counts(len(names), numResamples, rng)
+        successLower, successUpper = confidence_bands(successRates, counts,
+            confidence)
+        precisionLower, precisionUpper = confidence_bands(precisions, counts,
+            confidence)
+        successP = sign_flip_pvalues(successRates.mean(axis=2),
+            numPermutations, rng)
+        precisionP = sign_flip_pvalues(precisions[:, :, precisionIndex],
+            numPermutations, rng)
+        for i, score in enumerate(scores):
+            score.successRateCI = [successLower[i].tolist(),
+                successUpper[i].tolist()]
+            score.precisionCI = [precisionLower[i].tolist(),
+                precisionUpper[i].tolist()]
+            score.pValues = dict((t, {'success': float(successP[i, j]),
+                'precision': float(precisionP[i, j])})
+                for j, t in enumerate(trackers) if j != i)
+
+
+def _find_score(scores, name):
+    for score in scores:
+        if score.name == name:
+            return score
+    return None
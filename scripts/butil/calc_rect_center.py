@@ -2,79 +2,105 @@ import math
 import numpy as np
 
 def corners2rect(corners):
-    result_corners = np.floor(corners[:,0:4])
-    x = result_corners[0,0]
-    y = result_corners[1,0]
-    w = result_corners[0,2] - x
-    h = result_corners[1,2] - y
-    rect = map(int, [x, y, w, h])
-    return rect
+    return corners2rects(np.asarray(corners)[np.newaxis])[0].tolist()
+
+def corners2rects(corners):
+    """Get the bounding rects of a batch of corner sets.
+
+    corners is an (N, 2, K) array of x and y coordinates of K >= 4 corners,
+    ordered like the corners of a template. Returns an (N, 4) int array of
+    [x, y, w, h], computed from the first and third corner.
+    """
+    result_corners = np.floor(corners[:, :, 0:4])
+    x = result_corners[:, 0, 0]
+    y = result_corners[:, 1, 0]
+    w = result_corners[:, 0, 2] - x
+    h = result_corners[:, 1, 2] - y
+    return np.stack([x, y, w, h], axis=1).astype(int)
 
 def rect_affine_IVT(tmplsize, res):
+    return rects_affine_IVT(tmplsize, [res])[0].tolist()
+
+def rects_affine_IVT(tmplsize, params):
+    """Convert an (N, 6) array of IVT affine parameters to (N, 4) rects."""
     w = float(tmplsize[0])
     h = float(tmplsize[1])
-    corners = np.matrix((
+    corners = np.array((
         (1,-w/2,-h/2),
         (1,w/2,-h/2),
         (1,w/2,h/2),
         (1,-w/2,h/2),
         (1,-w/2,-h/2))).T
-    p = res
-    M = np.matrix(((p[0], p[2], p[3]), (p[1], p[4], p[5])))
-    c = M * corners
-    rect = corners2rect(c)
-    return rect
+    p = np.asarray(params, dtype=float).reshape(-1, 6)
+    M = np.stack((p[:, [0, 2, 3]], p[:, [1, 4, 5]]), axis=1)
+    return corners2rects(M @ corners)
 
 def rect_affine_L1(tmplsize, res):
+    return rects_affine_L1(tmplsize, [res])[0].tolist()
+
+def rects_affine_L1(tmplsize, params):
+    """Convert an (N, 6) array of L1 affine parameters to (N, 4) rects."""
     w = float(tmplsize[0])
     h = float(tmplsize[1])
-    corners = np.matrix((
+    corners = np.array((
         (1,w,w,1),
         (1,1,h,h),
         (1,1,1,1)))
-    p = res
-    M = np.matrix(((p[2], p[3], p[5]), (p[0], p[1], p[4])))
-    c = M * corners
-    rect = corners2rect(c)
-    return rect
+    p = np.asarray(params, dtype=float).reshape(-1, 6)
+    M = np.stack((p[:, [2, 3, 5]], p[:, [0, 1, 4]]), axis=1)
+    return corners2rects(M @ corners)
 
 def rect_affine_LK(tmplsize, res):
+    return rects_affine_LK(tmplsize, res)[0].tolist()
+
+def rects_affine_LK(tmplsize, params):
+    """Convert LK warp matrices to (N, 4) rects.
+
+    params is a (2N, 3) array; every two rows are the 2x3 warp matrix of a
+    frame.
+    """
     h = float(tmplsize[0])
     w = float(tmplsize[1])
-    corners = np.matrix((
+    corners = np.array((
         (1,1,1),
         (1,h,1),
         (w,h,1),
         (w,1,1))).T
-    p = res
-    M = np.matrix(((p[0], p[1], p[4]), (p[2], p[3], p[5])))
-    c = M * corners
-    rect = corners2rect(c)
-    return rect
+    M = np.asarray(params, dtype=float).reshape(-1, 2, 3)
+    return corners2rects(M @ corners)
 
 def rect_4corners(res):
-    rect = corners2rect(res)
-    return rect
+    return rects_4corners(res)[0].tolist()
+
+def rects_4corners(params):
+    """Convert corners to (N, 4) rects.
+
+    params is a (2N, K) array; every two rows are the x and y coordinates of
+    the corners in a frame.
+    """
+    corners = np.asarray(params, dtype=float)
+    return corners2rects(corners.reshape(-1, 2, corners.shape[-1]))
 
 def rect_similarity(tmplsize, res):
+    return rects_similarity(tmplsize, [res])[0].tolist()
+
+def rects_similarity(tmplsize, params):
+    """Convert an (N, 4) array of similarity parameters, [scale, angle, x, y],
+    to (N, 4) rects."""
     h = float(tmplsize[0])
     w = float(tmplsize[1])
 
-    corners = np.matrix((
+    corners = np.array((
         (1,w,w,1),
         (1,1,h,h),
         (1,1,1,1)))
-    p = res
-    s = np.matrix((
-            (math.cos(p[1]), -math.sin(p[1])),
-            (-math.sin(p[1]), math.cos(p[1]))))
-    s = p[0] * s
-    M = np.matrix((
-            (s[0,0], s[0,1], p[2]),
-            (s[1,0], s[1,1], p[3])))
-    c = M * corners
-    rect = corners2rect(c)
-    return rect
+    p = np.asarray(params, dtype=float).reshape(-1, 4)
+    cos = p[:, 0] * np.cos(p[:, 1])
+    sin = p[:, 0] * -np.sin(p[:, 1])
+    M = np.stack((
+            np.stack((cos, sin, p[:, 2]), axis=1),
+            np.stack((sin, cos, p[:, 3]), axis=1)), axis=1)
+    return corners2rects(M @ corners)
 
 
 def calc_rect_center(*params):
@@ -102,7 +128,7 @@ def calc_rect_center(*params):
     y = result_corners[1,0]
     w = result_corners[0,2] - x
     h = result_corners[1,2] - y
-    rect = map(int, [x, y, w, h])
+    rect = [int(v) for v in [x, y, w, h]]
     center = np.mean(corners[:,0:4],1)
     return rect, center, corners
 
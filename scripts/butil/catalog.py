@@ -0,0 +1,160 @@
+"""A cached catalog of the sequences in SEQ_SRC.
+
+setup_seqs() used to list every img directory, parse the attributes and
+ground truth, and rewrite every cfg.json on each run, and the sequence lists
+were re-read on each call of get_seq_names(). The catalog, SEQ_SRC/catalog.json,
+keeps the result of that work:
+
+    seqs    for each sequence, its configuration (the fields of cfg.json,
+            including the size of its frames), its frame count, its
+            attributes as a bitmask (scripts.butil.attributes), where its
+            ground truth is in scripts.butil.gt_store, and a stamp
+    lists   the sequence names of tb_50.txt, tb_100.txt, and cvpr13.txt, with
+            the stamp of each file
+
+A sequence's stamp holds the modification time of its img directory, and the
+modification time and size of its ground truth and attribute files. An entry
+whose stamp doesn't match the files is stale, and setup_seqs() rebuilds only
+the stale entries. Other files, such as frame packs, can be added to the
+sequence's directory without making its entry stale.
+"""
+
+import collections
+import json
+import os
+import threading
+
+import config
+import scripts.butil.attributes
+import scripts.butil.gt_store
+import scripts.model.sequence
+
+CATALOG_FILE = 'catalog.json'
+VERSION = 4
+
+_cache = {'stamp': None, 'catalog': None}
+_lock = threading.Lock()
+
+
+def seq_stamp(seqName):
+    """Get the stamp of a sequence's files, or None if some are missing."""
+    src = os.path.join(config.SEQ_SRC, seqName)
+    try:
+        return [os.stat(os.path.join(src, 'img')).st_mtime_ns,
+            _file_stamp(os.path.join(src, config.GT_FILE)),
+            _file_stamp(os.path.join(src, config.ATTR_FILE))]
+    except OSError:
+        return None
+
+
+def get_seq(seqName):
+    """Get the catalog entry of a sequence.
+
+    Returns:
+        The entry, or None if the sequence is not in the catalog or its entry
+        is stale.
+    """
+    with _lock:
+        entry = _load()['seqs'].get(seqName)
+    if entry is None or entry['stamp'] != seq_stamp(seqName):
+        return None
+    return entry
+
+
+def make_entry(seq):
+    """Make the catalog entry of a sequence, with the current stamp.
+
+    Args:
+        seq: A scripts.model.sequence.Sequence, as set up by
+            make_seq_configs(), whose files are written.
+    """
+    cfg = seq.to_dict()
+    del cfg['gtRect']
+    return collections.OrderedDict([
+        ('stamp', seq_stamp(seq.name)),
+        ('cfg', cfg),
+        ('frames', seq.endFrame - seq.startFrame + 1),
+        ('attrMask', scripts.butil.attributes.to_mask(seq.attributes)),
+        ('gt', scripts.butil.gt_store.get_entry(seq.name))])
+
+
+def put_seqs(seqs):
+    """Add or replace the entries of sequences, and write the catalog."""
+    entries = [make_entry(seq) for seq in seqs]
+    if not entries:
+        return
+    with _lock:
+        catalog = _load()
+        for entry in entries:
+            catalog['seqs'][entry['cfg']['name']] = entry
+        _save(catalog)
+
+
+def make_seq(entry):
+    """Make a Sequence from a catalog entry, as load_seq_config() does."""
+    seq = scripts.model.sequence.Sequence(
+        gtRect=scripts.butil.gt_store.get_gt(entry['cfg']['name']),
+        **entry['cfg'])
+    seq.path = os.path.join(os.path.abspath(seq.path), '')
+    return seq
+
+
+def get_list(fileName):
+    """Get the sequence names of a list file in SEQ_SRC.
+
+    Returns:
+        The names, or None if the list is not in the catalog or the file
+        changed.
+    """
+    stamp = _file_stamp(os.path.join(config.SEQ_SRC, fileName))
+    with _lock:
+        entry = _load()['lists'].get(fileName)
+    if entry is None or entry['stamp'] != stamp:
+        return None
+    return entry['names']
+
+
+def put_list(fileName, names):
+    """Add or replace the names of a list file, and write the catalog."""
+    stamp = _file_stamp(os.path.join(config.SEQ_SRC, fileName))
+    with _lock:
+        catalog = _load()
+        catalog['lists'][fileName] = {'stamp': stamp, 'names': list(names)}
+        _save(catalog)
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load():
+    path = os.path.join(config.SEQ_SRC, CATALOG_FILE)
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return {'version': VERSION, 'seqs': collections.OrderedDict(),
+            'lists': collections.OrderedDict()}
+    if _cache['stamp'] != (path, stamp):
+        catalogFile = open(path)
+        catalog = json.load(catalogFile,
+            object_pairs_hook=collections.OrderedDict)
+        catalogFile.close()
+        if catalog.get('version') != VERSION:
+            catalog = {'version': VERSION, 'seqs': collections.OrderedDict(),
+                'lists': collections.OrderedDict()}
+        _cache['stamp'] = (path, stamp)
+        _cache['catalog'] = catalog
+    return _cache['catalog']
+
+
+def _save(catalog):
+    path = os.path.join(config.SEQ_SRC, CATALOG_FILE)
+    catalogFile = open(path + '.tmp', 'w')
+    json.dump(catalog, catalogFile, indent=1)
+    catalogFile.close()
+    os.replace(path + '.tmp', path)
+    _cache['stamp'] = (path, _file_stamp(path))
+    _cache['catalog'] = catalog
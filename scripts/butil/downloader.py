@@ -0,0 +1,293 @@
+"""Download sequence archives concurrently, with resume and checksums.
+
+Each archive is downloaded to <archive>.zip.part in SEQ_SRC. If a download is
+interrupted, the next attempt asks the server for the rest of the file with a
+Range request, and starts over if the server doesn't support ranges. The
+SHA-256 of the archive is computed while it's written, and checked against
+the manifest, SEQ_SRC/<DOWNLOAD_MANIFEST>, which has a "<sha256>  <file>"
+line per archive. An archive which is not in the manifest is added to it when
+it's downloaded, so later downloads are checked against it.
+
+A zip file's directory is at its end, so an archive can't be extracted before
+it's complete. Instead, several archives are downloaded at once, and each one
+is extracted, straight from the file, as soon as it's complete, while the
+others are still downloading.
+
+Jogging, Skating2, and Human4 have two targets each; their archives are split
+into the sequences Jogging-1, Jogging-2, and so on.
+
+usage : python -m scripts.butil.downloader [-j <jobs>] [-u <url>] <sequences>
+"""
+
+import collections
+import concurrent.futures
+import getopt
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+
+import config
+
+CHUNK_SIZE = 1 << 20
+
+# The sequences which are split out of another sequence's archive
+_SPLITS = {
+    'Jogging-1': 'Jogging',
+    'Jogging-2': 'Jogging',
+    'Skating2-1': 'Skating2',
+    'Skating2-2': 'Skating2',
+    'Human4-1': 'Human4',
+    'Human4-2': 'Human4',
+}
+
+_manifest_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """A sequence archive couldn't be downloaded, verified, or extracted."""
+
+
+def archive_name(seqName):
+    """Get the name of the archive which has a sequence."""
+    return _SPLITS.get(seqName, seqName)
+
+
+def download_sequences(seqNames, seqSrc=None, url=None, jobs=None,
+        opener=None):
+    """Download and extract sequences.
+
+    Args:
+        seqNames: The names of the sequences.
+        seqSrc: The directory for the sequences. The default is SEQ_SRC.
+        url: The URL template of the archives, with {0} for the archive name.
+            The default is DOWNLOAD_URL.
+        jobs: The number of archives to download at once. The default is
+            DOWNLOAD_JOBS.
+        opener: The function which opens a urllib.request.Request, like
+            urllib.request.urlopen, which is the default.
+
+    Raises:
+        DownloadError: Some sequences failed. The others are downloaded.
+    """
+    seqSrc = seqSrc or config.SEQ_SRC
+    url = url or config.DOWNLOAD_URL
+    jobs = jobs or config.DOWNLOAD_JOBS
+    opener = opener or urllib.request.urlopen
+    archives = collections.OrderedDict()
+    for seqName in seqNames:
+        archives.setdefault(archive_name(seqName), []).append(seqName)
+
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = dict(
+            (pool.submit(_download_archive, archive, names, seqSrc,
+                url.format(archive), opener), archive)
+            for archive, names in archives.items())
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except DownloadError as error:
+                errors.append(str(error))
+    if os.path.exists(os.path.join(seqSrc, '__MACOSX')):
+        shutil.rmtree(os.path.join(seqSrc, '__MACOSX'))
+    if errors:
+        raise DownloadError('\n'.join(sorted(errors)))
+
+
+def download_sequence(seqName, seqSrc=None, url=None, opener=None):
+    """Download and extract one sequence."""
+    download_sequences([seqName], seqSrc, url, 1, opener)
+
+
+def fetch(url, dst, opener=None):
+    """Download a file, resuming a partial download.
+
+    The file is written to dst + '.part', and renamed to dst when it's
+    complete.
+
+    Returns:
+        The SHA-256 of the file, as a hex string.
+
+    Raises:
+        DownloadError: The server failed, or the file is shorter than the
+            server said.
+    """
+    opener = opener or urllib.request.urlopen
+    part = dst + '.part'
+    sha = hashlib.sha256()
+    offset = 0
+    if os.path.exists(part):
+        partFile = open(part, 'rb')
+        for chunk in iter(lambda: partFile.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+            offset += len(chunk)
+        partFile.close()
+
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header('Range', 'bytes={0}-'.format(offset))
+    try:
+        response = opener(request)
+    except urllib.error.HTTPError as error:
+        if error.code != 416 or not offset:
+            raise DownloadError('{0}: {1}'.format(url, error)) from error
+        # The part file is already complete.
+        os.replace(part, dst)
+        return sha.hexdigest()
+    except (urllib.error.URLError, OSError) as error:
+        raise DownloadError('{0}: {1}'.format(url, error)) from error
+
+    try:
+        status = getattr(response, 'status', None) or response.getcode()
+        if offset and status != 206:
+            # The server sent the whole file.
+            sha = hashlib.sha256()
+            offset = 0
+        total = _total_size(response, offset)
+        partFile = open(part, 'ab' if offset else 'wb')
+        try:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                partFile.write(chunk)
+                sha.update(chunk)
+                offset += len(chunk)
+        finally:
+            partFile.close()
+    except OSError as error:
+        raise DownloadError('{0}: {1}'.format(url, error)) from error
+    finally:
+        response.close()
+    if total is not None and offset != total:
+        raise DownloadError('{0}: got {1} of {2} bytes'.format(
+            url, offset, total))
+    os.replace(part, dst)
+    return sha.hexdigest()
+
+
+def read_manifest(seqSrc=None):
+    """Read the checksum manifest.
+
+    Returns:
+        A dictionary which maps archive file names to SHA-256 hex strings.
+    """
+    path = os.path.join(seqSrc or config.SEQ_SRC, config.DOWNLOAD_MANIFEST)
+    checksums = {}
+    if os.path.exists(path):
+        manifest = open(path)
+        for line in manifest:
+            if line.strip():
+                checksum, fileName = line.split(None, 1)
+                checksums[fileName.strip().lstrip('*')] = checksum.lower()
+        manifest.close()
+    return checksums
+
+
+def verify(fileName, checksum, seqSrc=None):
+    """Check an archive's checksum against the manifest.
+
+    An archive which is not in the manifest is added to it.
+
+    Raises:
+        DownloadError: The checksum doesn't match the manifest.
+    """
+    seqSrc = seqSrc or config.SEQ_SRC
+    with _manifest_lock:
+        expected = read_manifest(seqSrc).get(fileName)
+        if expected is None:
+            manifest = open(os.path.join(seqSrc, config.DOWNLOAD_MANIFEST),
+                'a')
+            manifest.write('{0}  {1}\n'.format(checksum, fileName))
+            manifest.close()
+        elif expected != checksum:
+            raise DownloadError('{0}: the checksum {1} does not match {2}'
+                .format(fileName, checksum, expected))
+
+
+def _total_size(response, offset):
+    contentRange = response.headers.get('Content-Range')
+    if contentRange and '/' in contentRange:
+        total = contentRange.rsplit('/', 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def _download_archive(archive, seqNames, seqSrc, url, opener):
+    fileName = archive + '.zip'
+    dst = os.path.join(seqSrc, fileName)
+    print('Downloading {0} ...'.format(url))
+    checksum = fetch(url, dst, opener)
+    try:
+        verify(fileName, checksum, seqSrc)
+    except DownloadError:
+        # Download it again next time.
+        os.remove(dst)
+        raise
+    print('Extracting {0} ...'.format(fileName))
+    try:
+        archiveFile = zipfile.ZipFile(dst)
+        archiveFile.extractall(seqSrc)
+        archiveFile.close()
+    except (zipfile.BadZipFile, OSError) as error:
+        raise DownloadError('{0}: {1}'.format(fileName, error)) from error
+    os.remove(dst)
+    if any(name in _SPLITS for name in seqNames):
+        _split_archive(archive, seqSrc)
+
+
+def _split_archive(archive, seqSrc):
+    src = os.path.join(seqSrc, archive, '')
+    dst1 = os.path.join(seqSrc, archive + '-1', '')
+    dst2 = os.path.join(seqSrc, archive + '-2', '')
+    if archive == 'Human4':
+        # Only the second target of Human4 is used.
+        if not os.path.exists(dst2 + 'img'):
+            shutil.copytree(src + 'img', dst2 + 'img')
+        shutil.move(src + 'groundtruth_rect.2.txt', dst2 + config.GT_FILE)
+        shutil.rmtree(src)
+        return
+    if not os.path.exists(dst1 + 'img'):
+        shutil.copytree(src + 'img', dst1 + 'img')
+    if not os.path.exists(dst2 + 'img'):
+        shutil.copytree(src + 'img', dst2 + 'img')
+    shutil.move(src + 'groundtruth_rect.1.txt', dst1 + config.GT_FILE)
+    shutil.move(src + 'groundtruth_rect.2.txt', dst2 + config.GT_FILE)
+    if archive == 'Jogging':
+        shutil.move(src + 'jogging-1.txt', dst1 + config.INIT_OMIT_FILE)
+        shutil.move(src + 'jogging-2.txt', dst2 + config.INIT_OMIT_FILE)
+    shutil.rmtree(src)
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hj:u:", ["jobs=", "url="])
+    except getopt.GetoptError:
+        print(__doc__.split('usage : ')[1])
+        sys.exit(1)
+    jobs = None
+    url = None
+    for opt, arg in opts:
+        if opt == '-h':
+            print(__doc__.split('usage : ')[1])
+            sys.exit(0)
+        elif opt in ("-j", "--jobs"):
+            jobs = int(arg)
+        elif opt in ("-u", "--url"):
+            url = arg
+    seqNames = [x.strip() for x in ','.join(args).split(',') if x.strip()]
+    try:
+        download_sequences(seqNames, url=url, jobs=jobs)
+    except DownloadError as error:
+        print(error)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
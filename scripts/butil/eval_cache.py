@@ -0,0 +1,134 @@
+"""A cache of per-sequence evaluations, keyed by the content they depend on.
+
+Evaluating a tracker on a sequence computes the overlap and center error of
+every frame, and the sequence's success and precision curves. The attribute
+scores only combine the sequences' curves, so calc_result() caches each
+sequence's evaluation in the tracker's result directory:
+
+    results/<evalType>/<tracker>/eval_cache/<seqName>.npy   the evaluation
+    results/<evalType>/<tracker>/eval_cache/index.json      the key and array
+                                                            sizes of each one
+
+An evaluation is one float64 array, with the ARRAYS and then the SCALARS, one
+after the other. Its key is a hash of everything the evaluation depends on:
+the results, the ground truth, the thresholds, and VERSION, which changes if
+the evaluation code does. An evaluation whose key doesn't match is done
+again, so after a new or changed result, only its sequence is evaluated.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import config
+
+CACHE_DIR = 'eval_cache'
+INDEX_FILE = 'index.json'
+VERSION = 1
+
+# The arrays of an evaluation, and its scalars
+ARRAYS = ('aveCoverage', 'aveErrCenter', 'errCoverage', 'errCenter',
+    'successRates', 'precisions')
+SCALARS = ('overlapScore', 'errorNum')
+
+
+def get_cache_dir(evalType, tracker):
+    """Get the directory of a tracker's evaluation cache."""
+    return os.path.join(config.RESULT_SRC.format(evalType), tracker,
+        CACHE_DIR)
+
+
+def seq_key(evalType, seq, results):
+    """Hash everything a sequence's evaluation depends on.
+
+    Args:
+        evalType: The evaluation type.
+        seq: The scripts.model.sequence.Sequence, with its ground truth.
+        results: The sequence's list of scripts.model.result.Result objects.
+
+    Returns:
+        A hex string.
+    """
+    sha = hashlib.sha1()
+    sha.update(repr((VERSION, evalType, seq.startFrame,
+        list(config.thresholdSetOverlap),
+        list(config.thresholdSetError))).encode())
+    sha.update(np.ascontiguousarray(seq.gtRect, dtype=np.int64).tobytes())
+    for result in results:
+        sha.update(repr((result.startFrame, result.endFrame, result.resType,
+            result.tmplsize)).encode())
+        sha.update(np.ascontiguousarray(result.res, dtype=np.float64)
+            .tobytes())
+    return sha.hexdigest()
+
+
+class EvalCache:
+    """The evaluation cache of a tracker."""
+
+    def __init__(self, evalType, tracker):
+        self.src = get_cache_dir(evalType, tracker)
+        self._changed = False
+        try:
+            indexFile = open(os.path.join(self.src, INDEX_FILE))
+            self.index = json.load(indexFile)
+            indexFile.close()
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, seqName, key):
+        """Get a sequence's cached evaluation.
+
+        Returns:
+            A dictionary with the ARRAYS and SCALARS, or None if the sequence
+            isn't cached, or its key changed.
+        """
+        entry = self.index.get(seqName)
+        if entry is None or entry['key'] != key:
+            return None
+        try:
+            data = np.load(os.path.join(self.src, seqName + '.npy'))
+        except (OSError, ValueError):
+            return None
+        sizes = entry['sizes'] + [1] * len(SCALARS)
+        if len(data) != sum(sizes):
+            return None
+        evaluation = {}
+        offset = 0
+        for name, size in zip(ARRAYS + SCALARS, sizes):
+            if name in SCALARS:
+                evaluation[name] = float(data[offset])
+            else:
+                evaluation[name] = data[offset:offset + size]
+            offset += size
+        return evaluation
+
+    def put(self, seqName, key, evaluation):
+        """Cache a sequence's evaluation.
+
+        Args:
+            evaluation: A dictionary with the ARRAYS and SCALARS.
+        """
+        if not os.path.exists(self.src):
+            os.makedirs(self.src, exist_ok=True)
+        arrays = [np.asarray(evaluation[name], dtype=np.float64).reshape(-1)
+            for name in ARRAYS]
+        scalars = np.array([evaluation[name] for name in SCALARS],
+            dtype=np.float64)
+        path = os.path.join(self.src, seqName + '.npy')
+        np.save(path + '.tmp.npy', np.concatenate(arrays + [scalars]))
+        os.replace(path + '.tmp.npy', path)
+        self.index[seqName] = {'key': key, 'sizes': [len(x) for x in arrays]}
+        self._changed = True
+
+    def flush(self):
+        """Write the index, if put() changed it."""
+        if not self._changed:
+            return
+        path = os.path.join(self.src, INDEX_FILE)
+        indexFile = open(path + '.tmp', 'w')
+        json.dump(self.index, indexFile)
+        indexFile.close()
+        os.replace(path + '.tmp', path)
+        self._changed = False
@@ -1,37 +1,55 @@
 from config import *
+import numpy as np
+import scripts.butil.attributes
 import scripts.butil.calc_seq_err_robust
+import scripts.butil.eval_cache
 from scripts.model import score
 
-def calc_result(tracker, seqs, results, evalType):
+def calc_result(tracker, seqs, results, evalType, attrExprs=[],
+    seqCurves=None):
+    # seqCurves, if given, is filled with the curves of each sequence with
+    # results, as calc_seq_curves() returns them, by sequence name.
 
     seqResultList = dict((s.name,list()) for s in seqs)
+    if seqCurves is None:
+        seqCurves = dict()
+    if EVAL_CACHE:
+        evalCache = scripts.butil.eval_cache.EvalCache(evalType, tracker)
     for i in range(len(results)):
         subResults = results[i]
 
         seq = next(seq for seq in seqs if seq.name.lower() == subResults[0].seqName.lower())
-        seq.aveCoverage = []
-        seq.aveErrCenter = []
-        seq.errCoverage = []
-        seq.errCenter = []
 
         if evalType == 'SRE':
             idxNum = len(subResults)
-            anno = seq.gtRect
         elif evalType == 'TRE':
             idxNum = len(subResults)
         elif evalType == 'OPE':
             idxNum = 1
-            anno = seq.gtRect
+        seqResultList[seq.name] += subResults[:idxNum]
 
+        # A sequence whose results and ground truth didn't change since it
+        # was evaluated is read from the evaluation cache.
+        if EVAL_CACHE:
+            key = scripts.butil.eval_cache.seq_key(evalType, seq, subResults)
+            cached = evalCache.get(seq.name, key)
+            if cached is not None:
+                seq.aveCoverage = cached['aveCoverage'].tolist()
+                seq.aveErrCenter = cached['aveErrCenter'].tolist()
+                seq.errCoverage = cached['errCoverage'].tolist()
+                seq.errCenter = cached['errCenter'].tolist()
+                seqCurves[seq.name] = (cached['successRates'],
+                    cached['precisions'], cached['overlapScore'],
+                    cached['errorNum'])
+                continue
+
+        seq.aveCoverage = []
+        seq.aveErrCenter = []
+        seq.errCoverage = []
+        seq.errCenter = []
         for j in range(idxNum):
             result = subResults[j]
-            if evalType == 'TRE':
-                if len(seq.gtRect) < result.endFrame:
-                    anno = seq.gtRect[result.startFrame-seq.startFrame:
-                        result.endFrame-seq.startFrame+1]
-                else:
-                    anno = seq.gtRect[result.startFrame-1:
-                        result.endFrame]
+            anno = get_result_anno(seq, result, evalType)
 
             print(tracker, ": eval", seq.name)
             aveCoverage, aveErrCenter, errCoverage, errCenter = \
@@ -40,70 +58,136 @@ def calc_result(tracker, seqs, results, evalType):
             seq.aveErrCenter.append(aveErrCenter)
             seq.errCoverage += errCoverage
             seq.errCenter += errCenter
-
-            
-            seqName = seq.name
-            seqResultList[seqName].append(result)
         #end for j
+
+        # Each sequence's curves are computed once, from sorted errors, and
+        # each attribute averages the rows of its sequences.
+        curves = calc_seq_curves(seq)
+        seqCurves[seq.name] = curves
+        if EVAL_CACHE:
+            evalCache.put(seq.name, key, dict(aveCoverage=seq.aveCoverage,
+                aveErrCenter=seq.aveErrCenter, errCoverage=seq.errCoverage,
+                errCenter=seq.errCenter, successRates=curves[0],
+                precisions=curves[1], overlapScore=curves[2],
+                errorNum=curves[3]))
     # end for i
+    if EVAL_CACHE:
+        evalCache.flush()
+
+    # Sequences without results are left out of the scores, instead of
+    # scoring the errors another tracker left on them.
+    attrList = calc_scores(tracker, seqs, evalType, seqCurves, attrExprs)
+    return seqResultList, attrList
 
+def calc_scores(tracker, seqs, evalType, seqCurves, attrExprs=[]):
+    """Compute the attribute scores from the curves of each sequence.
+
+    Args:
+        tracker: The tracker name.
+        seqs: The sequences.
+        evalType: The evaluation type.
+        seqCurves: A dictionary which maps sequence names to their curves, as
+            calc_seq_curves() returns them. Sequences without curves are
+            left out of the scores.
+        attrExprs: Combinations of attributes such as 'OCC AND FM', which
+            get scores besides the single attributes and ALL.
+
+    Returns:
+        A sorted list of scripts.model.score.Score objects.
+    """
+    # row[i] is the row of seqs[i] in the curve arrays, or -1 if it has none.
+    row = np.full(len(seqs), -1, dtype=np.int64)
+    curves = []
+    for i, seq in enumerate(seqs):
+        if seq.name in seqCurves:
+            row[i] = len(curves)
+            curves.append(seqCurves[seq.name])
+    successRates = np.array([c[0] for c in curves])
+    precisions = np.array([c[1] for c in curves])
+
+    # Each attribute, and each combination in attrExprs such as
+    # 'OCC AND FM', selects its sequences from the attribute index.
+    attrIndex = scripts.butil.attributes.AttributeIndex(seqs)
+    overlapScores = np.array([c[2] for c in curves])
+    errorNums = np.array([c[3] for c in curves])
     attrList = score.getScoreList()
     allAttr = score.Score('ALL', 'All attributes', tracker, evalType)
-    allSuccessRateList = []
     attrList.append(allAttr)
+    attrList += [score.Score(x, x) for x in attrExprs]
     for attr in attrList:
-        successRateList = []
-        precisionList = []
+        idx = attrIndex.select(attr.name)
+        idx = idx[row[idx] >= 0]
+        rows = row[idx]
         attr.tracker = tracker
         attr.evalType = evalType
-        attr.seqs = []
+        attr.seqs = [seqs[i].name for i in idx]
         attr.successRateList = []
         attr.precisionList = []
-        attr.overlapScores = []
-        attr.errorNum = []
-        for seq in seqs:
-            if attr.name in seq.attributes or attr.name.lower() == 'all':
-                attr.seqs.append(seq.name)
-                seqSuccessList = []
-                length = len(seq.errCoverage)
-                for threshold in thresholdSetOverlap:
-                    seqSuccess = [score for score in seq.errCoverage \
-                        if score > threshold]
-                    seqSuccessList.append(len(seqSuccess)/float(length))
-                successRateList.append(seqSuccessList)
-
-                overlapList = [score for score in seq.errCoverage if score > 0]
-                overlapScore = sum(overlapList) / len(overlapList)
-                attr.overlapScores.append(overlapScore)	
-
-                seqSuccessList = []
-                for threshold in thresholdSetError:
-                    seqSuccess = [err for err in seq.errCenter if err <= threshold]
-                    seqSuccessList.append(len(seqSuccess)/float(length))
-                precisionList.append(seqSuccessList)
-
-                THRESHOLD = 0.5
-                errorNum = len([score for score in seq.errCoverage if score < THRESHOLD]) / float(length) * 10
-                attr.errorNum.append(errorNum)
-            # end if
-        # end for seqs
-        if len(attr.overlapScores) > 0 :
-            attr.overlap = sum(attr.overlapScores) / len(attr.overlapScores) * 100
-
-        if len(attr.errorNum) > 0 :
-            attr.error = sum(attr.errorNum) / len(attr.errorNum)
-
-        if len(successRateList) > 0:
-            for i in range(len(thresholdSetOverlap)):
-                attr.successRateList.append(
-                    sum([rates[i] for rates in successRateList]) / float(len(successRateList)))
-        if len(precisionList) > 0:
-            for i in range(len(thresholdSetError)):
-                pre = [p[i] for p in precisionList]
-                precision = sum(pre) / float(len(pre))
-                attr.precisionList.append(precision)
-        attr.refresh_dict()
+        attr.overlapScores = overlapScores[rows].tolist()
+        attr.errorNum = errorNums[rows].tolist()
+        if len(idx) > 0:
+            attr.overlap = sum(attr.overlapScores) / len(idx) * 100
+            attr.error = sum(attr.errorNum) / len(idx)
+            attr.successRateList = _indexed_mean(successRates, rows).tolist()
+            attr.precisionList = _indexed_mean(precisions, rows).tolist()
     # end for scores
 
     attrList.sort()
-    return seqResultList, attrList
+    return attrList
+
+def get_result_anno(seq, result, evalType):
+    # The ground truth a result is compared with; a TRE result starts at its
+    # segment's first frame.
+    if evalType == 'TRE':
+        if len(seq.gtRect) < result.endFrame:
+            return seq.gtRect[result.startFrame-seq.startFrame:
+                result.endFrame-seq.startFrame+1]
+        return seq.gtRect[result.startFrame-1:result.endFrame]
+    return seq.gtRect
+
+def calc_seq_curves(seq):
+    """Compute the success and precision curves of a sequence.
+
+    The errors are sorted once, and the number of frames above or below each
+    threshold is found with a binary search.
+
+    Args:
+        seq: A sequence with errCoverage and errCenter lists, as set by
+            calc_result().
+
+    Returns:
+        A tuple (successRates, precisions, overlapScore, errorNum).
+        successRates is the fraction of frames with an overlap above each
+        threshold in thresholdSetOverlap. precisions is the fraction of
+        frames with a center error at most each threshold in
+        thresholdSetError; like before, frames without ground truth have an
+        error of -1 and are counted. overlapScore is the mean positive
+        overlap, and errorNum is ten times the fraction of frames with an
+        overlap below 0.5.
+    """
+    errCoverage = np.asarray(seq.errCoverage, dtype=np.float64)
+    errCenter = np.asarray(seq.errCenter, dtype=np.float64)
+    length = float(len(errCoverage))
+    sortedCoverage = np.sort(errCoverage)
+    sortedCenter = np.sort(errCenter)
+
+    above = len(sortedCoverage) - np.searchsorted(sortedCoverage,
+        thresholdSetOverlap, side='right')
+    successRates = above / length
+    atMost = np.searchsorted(sortedCenter, list(thresholdSetError),
+        side='right')
+    precisions = atMost / length
+
+    overlapList = errCoverage[errCoverage > 0]
+    overlapScore = scripts.butil.calc_seq_err_robust.sequential_sum(
+        overlapList) / len(overlapList)
+
+    THRESHOLD = 0.5
+    below = np.searchsorted(sortedCoverage, THRESHOLD, side='left')
+    errorNum = int(below) / length * 10
+    return successRates, precisions, overlapScore, errorNum
+
+def _indexed_mean(rows, idx):
+    # The rows are added in sequence order, like the original loops did, so
+    # the scores don't change in the last digit.
+    return np.cumsum(rows[idx], axis=0)[-1] / float(len(idx))
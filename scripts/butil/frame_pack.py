@@ -0,0 +1,191 @@
+"""Pre-decoded frame packs, one memory-mappable file per sequence.
+
+Reading a sequence from img/0001.jpg, img/0002.jpg, ... opens and decodes a
+file per frame, which is slow on network file systems. Packing a sequence
+decodes its frames once into two files in the sequence's directory:
+
+    frames.pack   the frames as raw uint8 RGB, one after the other
+    frames.json   the offset and shape of each frame, the scale the frames
+                  were resized by, and the stamp of the img directory
+
+Sequence.frame(i) then returns frame i as a read-only view of the mapped
+file, without a copy. The image files stay, and trackers which read them
+through s_frames are not affected. A pack whose img directory changed is not
+used.
+
+usage : python -m scripts.butil.frame_pack -s <sequences> [-r <scale>]
+            [--force]
+"""
+
+import getopt
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+from PIL import Image
+
+import config
+
+PACK_FILE = 'frames.pack'
+INDEX_FILE = 'frames.json'
+VERSION = 1
+
+_packs = {}
+_lock = threading.Lock()
+
+
+class FramePack:
+    """The frames of a packed sequence."""
+
+    def __init__(self, src, index):
+        """Map a pack.
+
+        Args:
+            src: The directory of the pack files.
+            index: The parsed index file.
+        """
+        self.scale = index['scale']
+        self.startFrame = index['startFrame']
+        self.offsets = index['offsets']
+        self.shapes = [tuple(x) for x in index['shapes']]
+        path = os.path.join(src, PACK_FILE)
+        if os.path.getsize(path):
+            self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def frame(self, i):
+        """Get frame i, counted from the first frame of the sequence.
+
+        Returns:
+            A read-only (height, width, 3) uint8 view of the pack.
+        """
+        shape = self.shapes[i]
+        offset = self.offsets[i]
+        return self.data[offset:offset + shape[0] * shape[1] * 3].reshape(
+            shape)
+
+
+def pack_sequence(seq, scale=1.0):
+    """Decode a sequence's frames into a pack.
+
+    Args:
+        seq: A scripts.model.sequence.Sequence.
+        scale: The factor the frames are resized by, such as 0.5. Results and
+            ground truth are not scaled; users of a downscaled pack scale the
+            boxes by pack.scale.
+
+    Returns:
+        The number of packed frames.
+    """
+    src = os.path.join(config.SEQ_SRC, seq.name)
+    imgSrc = os.path.join(src, 'img')
+    stamp = os.stat(imgSrc).st_mtime_ns
+    offsets = []
+    shapes = []
+    offset = 0
+    packPath = os.path.join(src, PACK_FILE)
+    packFile = open(packPath + '.tmp', 'wb')
+    try:
+        for frameNo in range(seq.startFrame, seq.endFrame + 1):
+            image = Image.open(os.path.join(imgSrc,
+                seq.imgFormat.format(frameNo)))
+            image = image.convert('RGB')
+            if scale != 1.0:
+                image = image.resize((max(1, round(image.width * scale)),
+                    max(1, round(image.height * scale))), Image.BILINEAR)
+            frame = np.asarray(image, dtype=np.uint8)
+            packFile.write(frame.tobytes())
+            offsets.append(offset)
+            shapes.append(list(frame.shape))
+            offset += frame.nbytes
+    finally:
+        packFile.close()
+    index = {'version': VERSION, 'scale': scale, 'stamp': stamp,
+        'startFrame': seq.startFrame, 'offsets': offsets, 'shapes': shapes}
+    indexPath = os.path.join(src, INDEX_FILE)
+    indexFile = open(indexPath + '.tmp', 'w')
+    json.dump(index, indexFile)
+    indexFile.close()
+    # The pack file is replaced first; a reader which sees the new index
+    # also sees the new pack.
+    os.replace(packPath + '.tmp', packPath)
+    os.replace(indexPath + '.tmp', indexPath)
+    with _lock:
+        _packs.pop(seq.name, None)
+    return len(offsets)
+
+
+def get_pack(seqName):
+    """Get the pack of a sequence.
+
+    Returns:
+        A FramePack, or None if the sequence is not packed, or its img
+        directory changed since it was packed.
+    """
+    src = os.path.join(config.SEQ_SRC, seqName)
+    indexPath = os.path.join(src, INDEX_FILE)
+    try:
+        indexStamp = os.stat(indexPath).st_mtime_ns
+        imgStamp = os.stat(os.path.join(src, 'img')).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        cached = _packs.get(seqName)
+        if cached is not None and cached[0] == (indexPath, indexStamp):
+            pack, stamp = cached[1], cached[2]
+        else:
+            indexFile = open(indexPath)
+            index = json.load(indexFile)
+            indexFile.close()
+            if index.get('version') != VERSION:
+                return None
+            pack = FramePack(src, index)
+            stamp = index['stamp']
+            _packs[seqName] = ((indexPath, indexStamp), pack, stamp)
+    if stamp != imgStamp:
+        return None
+    return pack
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hs:r:", ["sequence=", "scale=",
+            "force"])
+    except getopt.GetoptError:
+        print(__doc__.split('usage : ')[1])
+        sys.exit(1)
+    import scripts.butil.seq_config  # pylint: disable=import-outside-toplevel
+
+    loadSeqs = 'tb100'
+    scale = 1.0
+    force = False
+    for opt, arg in opts:
+        if opt == '-h':
+            print(__doc__.split('usage : ')[1])
+            sys.exit(0)
+        elif opt in ("-s", "--sequence"):
+            loadSeqs = arg
+            if loadSeqs.lower() not in ['all', 'tb50', 'tb100', 'cvpr13']:
+                loadSeqs = [x.strip() for x in arg.split(',')]
+        elif opt in ("-r", "--scale"):
+            scale = float(arg)
+        elif opt == "--force":
+            force = True
+    seqNames = scripts.butil.seq_config.get_seq_names(loadSeqs)
+    for seq in scripts.butil.seq_config.load_seq_configs(seqNames):
+        pack = get_pack(seq.name)
+        if pack is not None and pack.scale == scale and not force:
+            print(f'{seq.name}: packed')
+            continue
+        count = pack_sequence(seq, scale)
+        print(f'{seq.name}: packed {count} frames')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,289 @@
+"""Decoded sequence frames, cached for all the users in a process.
+
+The trackers which run in this process, and draw_bbox.py, get frames from a
+FrameProvider instead of decoding the image files themselves:
+
+    frame = scripts.butil.frames.get_provider().get(seq.s_frames[i])
+
+A frame is a read-only (height, width, 3) uint8 RGB array. The provider keeps
+the most recently used frames, up to FRAME_CACHE_MB megabytes, so when
+several trackers run over the same sequence, each frame is decoded once.
+
+The provider can also be backed by a SharedFrameRing, a fixed number of frame
+slots in shared memory (FRAME_RING in config.py). Processes which attach the
+same ring see the frames which any of them decoded, so worker processes don't
+each decode the same frames.
+"""
+
+import atexit
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt  # pylint: disable=import-error
+
+import numpy as np
+from PIL import Image
+
+import config
+
+
+class FrameProvider:
+    """A thread-safe LRU cache of decoded frames."""
+
+    def __init__(self, capacity=None, ring=None):
+        """Create an empty cache.
+
+        Args:
+            capacity: The maximum size of the cached frames, in bytes. The
+                default is FRAME_CACHE_MB.
+            ring: An optional SharedFrameRing which is checked before a frame
+                is decoded, and which gets the frames this provider decodes.
+        """
+        if capacity is None:
+            capacity = config.FRAME_CACHE_MB * 1024 * 1024
+        self.capacity = capacity
+        self.ring = ring
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Get a decoded frame.
+
+        Args:
+            path: The path of the image file.
+
+        Returns:
+            A read-only (height, width, 3) uint8 array.
+        """
+        with self._lock:
+            frame = self._frames.get(path)
+            if frame is not None:
+                self._frames.move_to_end(path)
+                self.hits += 1
+                return frame
+            self.misses += 1
+        # Decode without holding the lock, so other threads can use the
+        # cache. Two threads may decode the same frame; either copy is fine.
+        frame = None
+        if self.ring is not None:
+            frame = self.ring.get(path)
+        if frame is None:
+            frame = decode(path)
+            if self.ring is not None:
+                self.ring.put(path, frame)
+        frame.flags.writeable = False
+        with self._lock:
+            if path not in self._frames and frame.nbytes <= self.capacity:
+                self._frames[path] = frame
+                self.size += frame.nbytes
+                while self.size > self.capacity:
+                    _, old = self._frames.popitem(last=False)
+                    self.size -= old.nbytes
+        return frame
+
+    def clear(self):
+        """Drop all the cached frames."""
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+
+
+def decode(path):
+    """Decode an image file as a (height, width, 3) uint8 RGB array."""
+    image = Image.open(path)
+    try:
+        return np.asarray(image.convert('RGB'), dtype=np.uint8)
+    finally:
+        image.close()
+
+
+class SharedFrameRing:
+    """A fixed number of frame slots in shared memory.
+
+    Frames are put in the slot which their path hashes to, replacing the
+    frame which was there. Each slot has a header with the path hash, the
+    frame shape, and a version, which is odd while the slot is written, so
+    readers can tell a frame from a frame which was replaced while they read
+    it. Frames are copied out of the ring, since the slot can be reused.
+
+    Writers lock the slot first, with a lock on the slot's byte of a lock
+    file next to the shared memory, so two processes never write a slot at
+    once. A writer which finds the slot locked skips the frame.
+    """
+
+    # The header of a slot: path hash, height, width, version
+    HEADER = 4
+
+    def __init__(self, name, slots, slotBytes, create=False):
+        """Attach to a ring, or create it.
+
+        Args:
+            name: The name of the shared memory block.
+            slots: The number of frame slots.
+            slotBytes: The size of a slot. Larger frames are not put in the
+                ring.
+            create: True to create the block, which must not exist.
+        """
+        self.slots = slots
+        self.slotBytes = slotBytes
+        size = slots * (self.HEADER * 8 + slotBytes)
+        self._memory = _attach_memory(name, create, size)
+        self._created = create
+        self._headers = np.ndarray((slots, self.HEADER), dtype=np.int64,
+            buffer=self._memory.buf)
+        self._data = np.ndarray((slots, slotBytes), dtype=np.uint8,
+            buffer=self._memory.buf, offset=self._headers.nbytes)
+        self._lockPath = os.path.join(tempfile.gettempdir(), name + '.lock')
+        self._lockFile = os.open(self._lockPath,
+            os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        # Record locks belong to the process, so its threads take turns.
+        self._writeLock = threading.Lock()
+
+    @classmethod
+    def open(cls, name, slots, slotBytes):
+        """Attach to a ring, creating it if it doesn't exist."""
+        try:
+            return cls(name, slots, slotBytes, create=True)
+        except FileExistsError:
+            return cls(name, slots, slotBytes)
+
+    def get(self, path):
+        """Copy a frame out of the ring.
+
+        Returns:
+            The frame, or None if it's not in the ring.
+        """
+        key = _path_key(path)
+        slot = key % self.slots
+        header = self._headers[slot]
+        version = int(header[3])
+        if version % 2 or header[0] != key:
+            return None
+        height, width = int(header[1]), int(header[2])
+        frame = self._data[slot, :height * width * 3].reshape(
+            height, width, 3).copy()
+        if int(header[3]) != version or header[0] != key:
+            return None
+        return frame
+
+    def put(self, path, frame):
+        """Copy a frame into the ring, if it fits in a slot."""
+        if frame.nbytes > self.slotBytes:
+            return
+        key = _path_key(path)
+        slot = key % self.slots
+        with self._writeLock:
+            if not _lock_byte(self._lockFile, slot):
+                # Another process is writing this slot.
+                return
+            try:
+                header = self._headers[slot]
+                version = int(header[3])
+                header[3] = version + 1
+                header[0] = key
+                header[1], header[2] = frame.shape[:2]
+                self._data[slot, :frame.nbytes] = frame.reshape(-1)
+                header[3] = version + 2
+            finally:
+                _unlock_byte(self._lockFile, slot)
+
+    def close(self):
+        """Detach from the ring, and remove it if this object created it."""
+        self._headers = None
+        self._data = None
+        self._memory.close()
+        os.close(self._lockFile)
+        if self._created:
+            try:
+                self._memory.unlink()
+            except FileNotFoundError:
+                # Someone else removed it; unlink() didn't get to tell the
+                # resource tracker.
+                if os.name == 'posix':
+                    from multiprocessing import resource_tracker  # pylint: disable=import-outside-toplevel
+                    resource_tracker.unregister(self._memory._name,  # pylint: disable=protected-access
+                        'shared_memory')
+            try:
+                os.remove(self._lockPath)
+            except OSError:
+                pass
+
+
+def _attach_memory(name, create, size):
+    # Before Python 3.13, attaching to a block registers it with the
+    # process's resource tracker, which removes it when the process exits,
+    # so only the process which creates the block may register it.
+    # Unregistering after attaching won't do: a forked worker shares its
+    # parent's tracker, and would unregister the parent's block.
+    # pylint: disable=import-outside-toplevel
+    from multiprocessing import resource_tracker
+    from multiprocessing import shared_memory
+
+    if create:
+        return shared_memory.SharedMemory(name, True, size)
+    try:
+        return shared_memory.SharedMemory(name, False, size, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: \
+        None if rtype == 'shared_memory' else register(name, rtype)
+    try:
+        return shared_memory.SharedMemory(name, False, size)
+    finally:
+        resource_tracker.register = register
+
+
+def _lock_byte(fd, offset):
+    # Try to lock one byte of a file, without waiting.
+    try:
+        if fcntl is not None:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock_byte(fd, offset):
+    if fcntl is not None:
+        fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _path_key(path):
+    digest = hashlib.blake2b(path.encode(), digest_size=7).digest()
+    return int.from_bytes(digest, 'little')
+
+
+_provider = None
+_providerLock = threading.Lock()
+
+
+def get_provider():
+    """Get the frame provider of this process, creating it on first use."""
+    global _provider
+    with _providerLock:
+        if _provider is None:
+            ring = None
+            if config.FRAME_RING:
+                ring = SharedFrameRing.open(config.FRAME_RING['name'],
+                    config.FRAME_RING['slots'],
+                    config.FRAME_RING['slot_mb'] * 1024 * 1024)
+                atexit.register(ring.close)
+            _provider = FrameProvider(ring=ring)
+        return _provider
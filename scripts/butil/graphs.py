@@ -39,6 +39,9 @@ def draw_overlap(scores, tracker_colors, forced_tracker=None):
                 ...
                 [ Score, Score, Score, ..., Score ]  # tracker N
             ]
+            Scores are matched across trackers by attribute name, so the rows
+            may have different attributes, or the same ones in another order.
+            A graph shows the trackers which have its attribute.
 
     Returns:
         Nothing
@@ -49,11 +52,18 @@ def draw_overlap(scores, tracker_colors, forced_tracker=None):
     figures = []
     if not os.path.exists("graphs"):
         os.mkdir("graphs")
-    for a in range(len(scores[0])):
-        print("Graphing", scores[0][a].name)
+    names = []
+    for tracker in scores:
+        for score in tracker:
+            if score.name not in names:
+                names.append(score.name)
+    for name in names:
+        print("Graphing", name)
         attribute_scores = []
         for tracker in scores:
-            attribute_scores.append(tracker[a])
+            attribute_scores.extend(
+                score for score in tracker if score.name == name
+            )
         figure = _draw_overlap_graph(
             attribute_scores, tracker_colors, forced_tracker
         )
@@ -84,6 +94,7 @@ def _draw_overlap_graph(scores, tracker_colors, forced_tracker):
                 "line style": tracker_colors[score[1].tracker]["style"],
                 "opacity": 1.0 if score[1].tracker == forced_tracker else 0.5
             },
+            score[1].successRateCI,
         )
     i = _tracker_index(scores, forced_tracker)
     if i is not None and (i < a or b <= i):
@@ -97,6 +108,7 @@ def _draw_overlap_graph(scores, tracker_colors, forced_tracker):
                 "line style": tracker_colors[scores[i].tracker]["style"],
                 "opacity": 1.0,
             },
+            scores[i].successRateCI,
         )
     axes.legend()  # This must remain after the axes.plot() calls.
     return figure
@@ -127,8 +139,18 @@ def _make_axes(figure, title):
     return axes
 
 
-def _graph_data(axes, data, style):
+def _graph_data(axes, data, style, band=None):
     mean = sum(data) / len(data)
+    if band is not None:
+        # the bootstrap confidence band, see scripts/butil/bootstrap.py
+        axes.fill_between(
+            config.thresholdSetOverlap,
+            band[0],
+            band[1],
+            color=style["color"],
+            alpha=0.15 * style["opacity"],
+            linewidth=0,
+        )
     x, y = _smooth_data(config.thresholdSetOverlap, data)
     axes.plot(
         x,
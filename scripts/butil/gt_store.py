@@ -0,0 +1,198 @@
+"""A shared, memory-mapped store of the ground truth of all sequences.
+
+The ground truth rectangles of every sequence are kept in one contiguous
+(N, 4) int32 array in SEQ_SRC, with an index of where each sequence starts:
+
+    groundtruth-<n>.npy   the rectangles of all sequences
+    groundtruth.json      the name of the current array file, and the offset,
+                          frame count, and source file stamp of each sequence
+
+The array is memory-mapped, so Sequence.gtRect is a read-only view of it,
+sub-sequences slice it without copying, and worker processes share the pages
+through the page cache instead of each holding a copy.
+
+update() re-reads the groundtruth_rect.txt files which changed, and writes a
+new array file. Processes which still map an old file keep a valid view of
+it. The previous array file is kept, so a process which read the index just
+before the update can still open it; older files are removed by the next
+update.
+"""
+
+import collections
+import json
+import os
+import threading
+
+import numpy as np
+
+import config
+
+INDEX_FILE = 'groundtruth.json'
+DATA_PREFIX = 'groundtruth-'
+
+_cache = {'stamp': None, 'index': None, 'file': None, 'data': None}
+_lock = threading.Lock()
+
+
+def read_gt_file(path):
+    """Parse a ground truth file of tab, comma, or space separated ints.
+
+    Returns:
+        An (N, 4) int32 array.
+    """
+    gtFile = open(path)
+    gtLines = gtFile.readlines()
+    gtFile.close()
+    gtRect = []
+    for line in gtLines:
+        if '\t' in line:
+            gtRect.append([int(x) for x in line.strip().split("\t")])
+        elif ',' in line:
+            gtRect.append([int(x) for x in line.strip().split(",")])
+        elif ' ' in line:
+            gtRect.append([int(x) for x in line.strip().split(" ")])
+    return np.array(gtRect, dtype=np.int32).reshape(-1, 4)
+
+
+def update(seqNames):
+    """Add sequences to the store, or refresh them if their files changed.
+
+    Args:
+        seqNames: The names of sequences in SEQ_SRC.
+    """
+    with _lock:
+        index = _load_index()
+        seqs = index['seqs']
+        changed = collections.OrderedDict()
+        for name in seqNames:
+            path = os.path.join(config.SEQ_SRC, name, config.GT_FILE)
+            stamp = _file_stamp(path)
+            entry = seqs.get(name)
+            if entry is None or entry['stamp'] != stamp:
+                changed[name] = (read_gt_file(path), stamp)
+        if not changed:
+            return
+
+        data = _load_data(index)
+        parts = []
+        newSeqs = collections.OrderedDict()
+        offset = 0
+        for name, entry in seqs.items():
+            if name in changed:
+                continue
+            parts.append(data[entry['offset']:entry['offset'] + entry['count']])
+            newSeqs[name] = dict(entry, offset=offset)
+            offset += entry['count']
+        for name, (gtRect, stamp) in changed.items():
+            parts.append(gtRect)
+            newSeqs[name] = {'offset': offset, 'count': len(gtRect),
+                'stamp': stamp}
+            offset += len(gtRect)
+
+        # Write a new array file, then switch the index to it, so readers
+        # never see an index which doesn't match its array.
+        generation = index.get('generation', 0) + 1
+        fileName = '{0}{1}.npy'.format(DATA_PREFIX, generation)
+        np.save(os.path.join(config.SEQ_SRC, fileName),
+            np.concatenate(parts).astype(np.int32) if parts
+            else np.zeros((0, 4), dtype=np.int32))
+        newIndex = {'file': fileName, 'generation': generation,
+            'seqs': newSeqs}
+        indexPath = os.path.join(config.SEQ_SRC, INDEX_FILE)
+        indexFile = open(indexPath + '.tmp', 'w')
+        json.dump(newIndex, indexFile, indent=2)
+        indexFile.close()
+        os.replace(indexPath + '.tmp', indexPath)
+        _remove_old_files(generation - 1)
+
+
+def get_gt(seqName):
+    """Get the ground truth of a sequence.
+
+    Returns:
+        A read-only (N, 4) int32 view of the memory-mapped store, or None if
+        the sequence is not in the store.
+    """
+    with _lock:
+        index = _load_index()
+        entry = index['seqs'].get(seqName)
+        if entry is None:
+            return None
+        data = _load_data(index)
+    return data[entry['offset']:entry['offset'] + entry['count']]
+
+
+def get_entry(seqName):
+    """Get where a sequence's ground truth is in the store.
+
+    Returns:
+        A dictionary with the array 'file', and the 'offset' and 'count' of
+        the sequence's rows in it, or None if the sequence is not in the store.
+    """
+    with _lock:
+        index = _load_index()
+        entry = index['seqs'].get(seqName)
+        if entry is None:
+            return None
+        return {'file': index['file'], 'offset': entry['offset'],
+            'count': entry['count']}
+
+
+def is_gt_view(gtRect, seqName):
+    """Check if gtRect is the store's whole view of a sequence's ground truth.
+
+    Such a view doesn't need to be pickled; get_gt() can recreate it.
+    """
+    if not isinstance(gtRect, np.memmap):
+        return False
+    view = get_gt(seqName)
+    return view is not None and view.shape == gtRect.shape and \
+        view.__array_interface__['data'][0] == \
+        gtRect.__array_interface__['data'][0]
+
+
+def _remove_old_files(keep):
+    # Remove the array files of the generations before keep.
+    for fileName in os.listdir(config.SEQ_SRC):
+        if not (fileName.startswith(DATA_PREFIX) and fileName.endswith('.npy')):
+            continue
+        try:
+            generation = int(fileName[len(DATA_PREFIX):-len('.npy')])
+        except ValueError:
+            continue
+        if generation < keep:
+            try:
+                os.remove(os.path.join(config.SEQ_SRC, fileName))
+            except OSError:
+                # another process removed it first
+                pass
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_index():
+    path = os.path.join(config.SEQ_SRC, INDEX_FILE)
+    try:
+        stamp = _file_stamp(path)
+    except OSError:
+        return {'seqs': collections.OrderedDict()}
+    if _cache['stamp'] != (path, stamp):
+        indexFile = open(path)
+        index = json.load(indexFile, object_pairs_hook=collections.OrderedDict)
+        indexFile.close()
+        _cache['stamp'] = (path, stamp)
+        _cache['index'] = index
+    return _cache['index']
+
+
+def _load_data(index):
+    if not index.get('file'):
+        return np.zeros((0, 4), dtype=np.int32)
+    path = os.path.join(config.SEQ_SRC, index['file'])
+    if _cache['file'] != path:
+        _cache['data'] = np.load(path, mmap_mode='r')
+        _cache['file'] = path
+    return _cache['data']
@@ -0,0 +1,102 @@
+"""Read the size of JPEG and PNG images from their headers.
+
+The size of a sequence's frames is needed to set up SRE and to draw results.
+Reading it doesn't need the pixels: a PNG file has it in its first chunk, and
+a JPEG file in its start of frame segment, which comes before the compressed
+data. read_size() reads only up to there, skipping over other segments such
+as EXIF data, and decodes nothing.
+"""
+
+import os
+import struct
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# The JPEG start of frame markers; 0xc4, 0xc8, and 0xcc are other segments.
+_SOF_MARKERS = frozenset(range(0xc0, 0xd0)) - {0xc4, 0xc8, 0xcc}
+# The JPEG markers without a segment
+_STANDALONE_MARKERS = frozenset(range(0xd0, 0xd9)) | {0x01}
+
+
+def read_size(path):
+    """Read the size of an image.
+
+    Args:
+        path: The path of a JPEG or PNG file.
+
+    Returns:
+        A tuple (width, height).
+
+    Raises:
+        ValueError: The file is not a JPEG or PNG file, or its header is
+            broken.
+    """
+    imageFile = open(path, 'rb')
+    try:
+        head = imageFile.read(len(_PNG_SIGNATURE))
+        if head == _PNG_SIGNATURE:
+            return _read_png_size(imageFile, path)
+        if head[:2] == b'\xff\xd8':
+            imageFile.seek(2)
+            return _read_jpeg_size(imageFile, path)
+    finally:
+        imageFile.close()
+    raise ValueError(f'{path} is not a JPEG or PNG file')
+
+
+def seq_size(seq):
+    """Get the size of a sequence's frames.
+
+    The size is the sequence's width and height, as cfg.json or the catalog
+    has them. A sequence without them, such as one whose cfg.json was written
+    before they were, gets them from the header of its first frame.
+
+    Args:
+        seq: A scripts.model.sequence.Sequence.
+
+    Returns:
+        A tuple (width, height).
+    """
+    if seq.width is None or seq.height is None:
+        seq.width, seq.height = read_size(os.path.join(seq.path,
+            seq.imgFormat.format(seq.startFrame)))
+    return seq.width, seq.height
+
+
+def _read_png_size(imageFile, path):
+    chunk = imageFile.read(16)
+    if len(chunk) < 16 or chunk[4:8] != b'IHDR':
+        raise ValueError(f'{path} has no PNG header')
+    return struct.unpack('>II', chunk[8:16])
+
+
+def _read_jpeg_size(imageFile, path):
+    while True:
+        byte = imageFile.read(1)
+        if not byte:
+            break
+        if byte != b'\xff':
+            continue
+        marker = imageFile.read(1)
+        # Any number of 0xff bytes can pad a marker.
+        while marker == b'\xff':
+            marker = imageFile.read(1)
+        if not marker:
+            break
+        marker = marker[0]
+        if marker == 0xd9 or marker == 0xda:
+            # the end of the image, or the compressed data, before a frame
+            break
+        if marker in _STANDALONE_MARKERS or marker == 0:
+            continue
+        length = imageFile.read(2)
+        if len(length) < 2:
+            break
+        length = struct.unpack('>H', length)[0]
+        if marker in _SOF_MARKERS:
+            segment = imageFile.read(5)
+            if len(segment) < 5:
+                break
+            height, width = struct.unpack('>HH', segment[1:5])
+            return width, height
+        imageFile.seek(length - 2, os.SEEK_CUR)
+    raise ValueError(f'{path} has no JPEG frame header')
@@ -0,0 +1,219 @@
+"""A leaderboard index of the saved scores of all trackers.
+
+save_scores() writes a JSON file per attribute to
+results/<evalType>/<tracker>/scores_<testname>/. Ranking the trackers used to
+open and parse every one of them, including the per-sequence lists. The
+leaderboard keeps what ranking and plotting need in one file per evaluation
+type and test name:
+
+    results/leaderboard/<evalType>_<testname>.json
+
+For each tracker, it holds the stamp of the tracker's scores directory, and
+for each attribute its description, success AUC, precision at 20 pixels,
+overlap, error, and its success and precision curves and confidence bands.
+The per-sequence lists and p-values are left out.
+
+save_scores() writes its files atomically, which changes the modification
+time of the scores directory, and updates the leaderboard. A tracker whose
+directory changed some other way is read again when the leaderboard is
+loaded; the other trackers are not.
+"""
+
+import collections
+import json
+import os
+import threading
+
+import config
+from scripts.model import score
+
+VERSION = 1
+
+# The Score fields kept in the leaderboard, besides the ranking keys
+FIELDS = ('desc', 'overlap', 'error', 'successRateList', 'precisionList',
+    'successRateCI', 'precisionCI')
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_path(evalType, testname):
+    """Get the path of a leaderboard file."""
+    return os.path.join(config.RESULT_SRC.format('leaderboard'),
+        f'{evalType}_{testname}.json')
+
+
+def get_scores_dir(evalType, tracker, testname):
+    """Get the directory of a tracker's scores, as save_scores() names it."""
+    if testname is None:
+        return os.path.join(config.RESULT_SRC.format(evalType), tracker,
+            'scores')
+    return os.path.join(config.RESULT_SRC.format(evalType), tracker,
+        f'scores_{testname}')
+
+
+def make_entry(scoreDict):
+    """Make the leaderboard entry of a score.
+
+    Args:
+        scoreDict: A score, as a dictionary like Score.to_dict() returns.
+
+    Returns:
+        A dictionary with the auc, the precision at 20 pixels, and FIELDS.
+    """
+    entry = collections.OrderedDict()
+    successRates = scoreDict.get('successRateList') or []
+    precisions = scoreDict.get('precisionList') or []
+    entry['auc'] = sum(successRates) / len(successRates) \
+        if successRates else 0
+    entry['precision'] = _precision_at_20(precisions)
+    for field in FIELDS:
+        entry[field] = scoreDict.get(field)
+    return entry
+
+
+def put_scores(evalType, testname, scoreList):
+    """Replace a tracker's entry with its new scores, and write the file.
+
+    Args:
+        scoreList: The tracker's scripts.model.score.Score objects, as passed
+            to save_scores(), which must have written them already.
+    """
+    tracker = scoreList[0].tracker
+    stamp = _dir_stamp(get_scores_dir(evalType, tracker, testname))
+    attrs = collections.OrderedDict((s.name, make_entry(s.to_dict()))
+        for s in sorted(scoreList))
+    with _lock:
+        board = _load(evalType, testname)
+        board['trackers'][tracker] = {'stamp': stamp, 'attrs': attrs}
+        _save(evalType, testname, board)
+
+
+def load(evalType, testname):
+    """Get the leaderboard, with the changed trackers read again.
+
+    Returns:
+        An ordered dictionary mapping each tracker with scores to an ordered
+        dictionary of its attributes' entries, see make_entry().
+    """
+    src = config.RESULT_SRC.format(evalType)
+    trackers = sorted(os.listdir(src)) if os.path.isdir(src) else []
+    with _lock:
+        board = _load(evalType, testname)
+        entries = board['trackers']
+        changed = False
+        for tracker in trackers:
+            stamp = _dir_stamp(get_scores_dir(evalType, tracker, testname))
+            entry = entries.get(tracker)
+            if stamp is None:
+                if entry is not None:
+                    del entries[tracker]
+                    changed = True
+            elif entry is None or entry['stamp'] != stamp:
+                entries[tracker] = {'stamp': stamp, 'attrs':
+                    _read_scores(evalType, tracker, testname)}
+                changed = True
+        for tracker in list(entries):
+            if tracker not in trackers:
+                del entries[tracker]
+                changed = True
+        if changed:
+            _save(evalType, testname, board)
+        return collections.OrderedDict((t, entries[t]['attrs'])
+            for t in sorted(entries))
+
+
+def rank(evalType, testname, attrName='ALL', key='auc'):
+    """Rank the trackers by a score of an attribute.
+
+    Args:
+        attrName: The attribute, or 'ALL'.
+        key: 'auc', 'precision', 'overlap', or 'error'. Trackers are ranked
+            from the highest to the lowest, except by error.
+
+    Returns:
+        A list of (tracker, entry) tuples, best first. Trackers without the
+        attribute are left out.
+    """
+    ranking = [(t, attrs[attrName]) for t, attrs in
+        load(evalType, testname).items() if attrName in attrs]
+    ranking.sort(key=lambda x: x[1][key], reverse=key != 'error')
+    return ranking
+
+
+def get_scores(evalType, testname):
+    """Get the trackers' scores from the leaderboard.
+
+    Returns:
+        A list of (tracker, scores) tuples, like load_all_scores() returned.
+        The scores are scripts.model.score.Score objects sorted by name, with
+        the success rates in percent, like load_scores() returns them, but
+        without seqs, overlapScores, errorNum, and pValues.
+    """
+    scoreList = []
+    for tracker, attrs in load(evalType, testname).items():
+        attrList = []
+        for name, entry in attrs.items():
+            attr = score.Score(name, entry['desc'], tracker, evalType,
+                **dict((f, entry[f]) for f in FIELDS if f != 'desc'))
+            attr.successRateList = [i*100 for i in attr.successRateList]
+            if attr.successRateCI is not None:
+                attr.successRateCI = [[i*100 for i in band]
+                    for band in attr.successRateCI]
+            attrList.append(attr)
+        attrList.sort()
+        scoreList.append((tracker, attrList))
+    return scoreList
+
+
+def _read_scores(evalType, tracker, testname):
+    src = get_scores_dir(evalType, tracker, testname)
+    attrs = collections.OrderedDict()
+    for fileName in sorted(os.listdir(src)):
+        if not fileName.endswith('.json'):
+            continue
+        scoreFile = open(os.path.join(src, fileName))
+        scoreDict = json.load(scoreFile)
+        scoreFile.close()
+        attrs[scoreDict['name']] = make_entry(scoreDict)
+    return attrs
+
+
+def _precision_at_20(precisions):
+    errors = list(config.thresholdSetError)
+    i = errors.index(20) if 20 in errors else 20
+    return precisions[i] if i < len(precisions) else 0
+
+
+def _dir_stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load(evalType, testname):
+    path = get_path(evalType, testname)
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        return {'version': VERSION, 'trackers': collections.OrderedDict()}
+    cached = _cache.get(path)
+    if cached is None or cached[0] != stamp:
+        boardFile = open(path)
+        board = json.load(boardFile, object_pairs_hook=collections.OrderedDict)
+        boardFile.close()
+        if board.get('version') != VERSION:
+            board = {'version': VERSION, 'trackers': collections.OrderedDict()}
+        _cache[path] = (stamp, board)
+    return _cache[path][1]
+
+
+def _save(evalType, testname, board):
+    path = get_path(evalType, testname)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    boardFile = open(path + '.tmp', 'w')
+    json.dump(board, boardFile)
+    boardFile.close()
+    os.replace(path + '.tmp', path)
+    _cache[path] = (os.stat(path).st_mtime_ns, board)
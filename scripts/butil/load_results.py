@@ -2,23 +2,11 @@ from config import *
 #from scripts import *
 from scripts.model import score
 import scripts.model.result as result
+import scripts.butil.leaderboard
+import scripts.butil.result_store
 
 def save_seq_result(result):
-    tracker = result[0].tracker
-    seqName = result[0].seqName
-    evalType = result[0].evalType
-    src = RESULT_SRC.format(evalType) + tracker
-    if not os.path.exists(src):
-        os.makedirs(src)
-    try:
-        string = json.dumps(result, default=lambda o : o.__dict__)
-    except:
-        print(map(type, result[0].__dict__.values()))
-        sys.exit()
-    fileName = src + '/{0}.json'.format(seqName)
-    resultFile = open(fileName, 'w')
-    resultFile.write(string)
-    resultFile.close()
+    scripts.butil.result_store.save(result)
 
 def save_scores(scoreList, testname=None):
     tracker = scoreList[0].tracker
@@ -31,11 +19,15 @@ def save_scores(scoreList, testname=None):
     if not os.path.exists(scoreSrc):
         os.makedirs(scoreSrc)
     for score in scoreList:
-        string = json.dumps(score, default=lambda o : o.__dict__)
+        string = json.dumps(score.to_dict())
         fileName = scoreSrc + '/{0}.json'.format(score.name)
-        scoreFile = open(fileName, 'w')
+        # Replacing the file changes the modification time of scoreSrc,
+        # which the leaderboard checks.
+        scoreFile = open(fileName + '.tmp', 'w')
         scoreFile.write(string)
         scoreFile.close()
+        os.replace(fileName + '.tmp', fileName)
+    scripts.butil.leaderboard.put_scores(evalType, testname, scoreList)
 
 def load_all_results(evalType):
     resultSRC = RESULT_SRC.format(evalType)
@@ -53,7 +45,8 @@ def load_result(evalType, tracker):
     src = os.path.join(resultSRC, tracker)
     resultNames = os.listdir(src)
     attrs = []
-    results = []
+    stored = scripts.butil.result_store.load(evalType, tracker)
+    results = list(stored.values())
     for name in resultNames:
         if name == 'attributes':
             attrSrc = os.path.join(src, name)
@@ -66,22 +59,29 @@ def load_result(evalType, tracker):
                 attr.successRateList = map(lambda o:o*100, attr.successRateList)
                 attrs.append(attr)
                 attrs.sort()
-        elif name.endswith('.json'):
-            resultFile = open(os.path.join(src, name))
-            string = resultFile.read()
-            jsonList = json.loads(string)
-            if type(jsonList) is list:
-                results.append([result.Result(**j) for j in jsonList])
-            elif type(jsonList) is dict:
-                results.append([result.Result(**jsonList)])
-    print('({0} seqs)'.format(len(resultNames) - 1))
+        elif name.endswith('.json') and name[:-len('.json')] not in stored:
+            # results saved before the result store
+            results.append(load_json_result(os.path.join(src, name)))
+    print('({0} seqs)'.format(len(results)))
     return results, attrs
 
 def load_seq_result(evalType, tracker, sequence):
-    resultSRC = RESULT_SRC.format(evalType)
     print('Loading {0}/{1}...'.format(tracker, sequence))
+    results = scripts.butil.result_store.load_seq(evalType, tracker, sequence)
+    if results is not None:
+        return results
+    resultSRC = RESULT_SRC.format(evalType)
     src = os.path.join(resultSRC, tracker)
     result_src = os.path.join(src, sequence+'.json')
+    return load_json_result(result_src)
+
+def has_seq_result(evalType, tracker, sequence):
+    if sequence in scripts.butil.result_store.seq_names(evalType, tracker):
+        return True
+    src = os.path.join(RESULT_SRC.format(evalType), tracker)
+    return os.path.exists(os.path.join(src, sequence+'.json'))
+
+def load_json_result(result_src):
     resultFile = open(result_src)
     string = resultFile.read()
     jsonList = json.loads(string)
@@ -92,10 +92,9 @@ def load_seq_result(evalType, tracker, sequence):
     return None
 
 def load_all_scores(evalType, testname):
-    resultSRC = RESULT_SRC.format(evalType)
-    trackers = os.listdir(resultSRC)
-    attrList = [(t, load_scores(evalType, t, testname)) for t in trackers]
-    return attrList
+    # The scores are read from the leaderboard, without the per-sequence
+    # lists; load_scores() reads all of a tracker's scores.
+    return scripts.butil.leaderboard.get_scores(evalType, testname)
 
 def load_scores(evalType, tracker, testname):
     resultSRC = RESULT_SRC.format(evalType)
@@ -110,6 +109,9 @@ def load_scores(evalType, tracker, testname):
         attr = score.Score(**j)
         #attr.successRateList = map(lambda o:o*100, attr.successRateList)
         attr.successRateList = [i*100 for i in attr.successRateList]
+        if attr.successRateCI is not None:
+            attr.successRateCI = [[i*100 for i in band]
+                for band in attr.successRateCI]
         attrs.append(attr)
         attrs.sort()
     return attrs
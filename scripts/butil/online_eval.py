@@ -0,0 +1,180 @@
+"""Score a tracker while it runs.
+
+calc_result() scores a tracker after all its results are in. An
+OnlineEvaluator instead takes the results as they arrive, a sequence at a time
+as the scheduler finishes them, and keeps running counts per sequence:
+
+    the number of scored frames
+    the number of frames whose overlap is above each overlap threshold
+    the number of frames whose center error is at most each error threshold
+    the sum and number of positive overlaps
+    the number of frames whose overlap is below 0.5
+
+The partial success and precision curves of a sequence, an attribute, or all
+sequences come from these counts at any time, without keeping the results.
+Once a sequence is scored completely, its curves equal those of
+calc_result() to the last digit, so the final scores are computed from them
+instead of evaluating the results again.
+
+With EARLY_ABORT_AUC set, a tracker whose success AUC over all sequences is
+below it after EARLY_ABORT_MIN_SEQS sequences is reported as hopeless, so
+the rest of its jobs can be cancelled.
+"""
+
+import numpy as np
+
+import config
+import scripts.butil.attributes
+import scripts.butil.calc_seq_err_robust
+import scripts.butil.eval_results
+
+
+class OnlineEvaluator:
+    """Running success and precision counts of one tracker."""
+
+    def __init__(self, tracker, seqs, evalType):
+        """Start with no frames scored.
+
+        Args:
+            tracker: The tracker name.
+            seqs: The sequences the tracker runs on.
+            evalType: The evaluation type.
+        """
+        self.tracker = tracker
+        self.seqs = seqs
+        self.evalType = evalType
+        self.attrIndex = scripts.butil.attributes.AttributeIndex(seqs)
+        self._seqIndex = dict((seq.name, i) for i, seq in enumerate(seqs))
+        self._overlapThresholds = np.array(config.thresholdSetOverlap,
+            dtype=np.float64)
+        self._errorThresholds = np.array(list(config.thresholdSetError),
+            dtype=np.float64)
+        count = len(seqs)
+        self.frames = np.zeros(count, dtype=np.int64)
+        self.above = np.zeros((count, len(self._overlapThresholds)),
+            dtype=np.int64)
+        self.atMost = np.zeros((count, len(self._errorThresholds)),
+            dtype=np.int64)
+        self.overlapSum = np.zeros(count, dtype=np.float64)
+        self.overlapCount = np.zeros(count, dtype=np.int64)
+        self.failures = np.zeros(count, dtype=np.int64)
+        self.done = np.zeros(count, dtype=bool)
+        # set by the caller which stops running the tracker
+        self.aborted = False
+
+    def add_result(self, result):
+        """Score a segment's result, a scripts.model.result.Result."""
+        seq = self.seqs[self._seqIndex[result.seqName]]
+        anno = scripts.butil.eval_results.get_result_anno(seq, result,
+            self.evalType)
+        _, _, errCoverage, errCenter = \
+            scripts.butil.calc_seq_err_robust.calc_seq_err_robust(result, anno)
+        self._add(self._seqIndex[seq.name], errCoverage, errCenter)
+
+    def finish_seq(self, seqName):
+        """Mark a sequence as scored completely."""
+        self.done[self._seqIndex[seqName]] = True
+
+    def seq_curves(self):
+        """Get the partial curves of all the sequences.
+
+        Returns:
+            A tuple (successRates, precisions, overlapScores, errorNums), as
+            calc_seq_curves() computes them, with a row or item per sequence.
+            Sequences without scored frames have zeros.
+        """
+        frames = np.maximum(self.frames, 1).astype(np.float64)
+        successRates = self.above / frames[:, None]
+        precisions = self.atMost / frames[:, None]
+        overlapScores = self.overlapSum / np.maximum(self.overlapCount, 1)
+        errorNums = self.failures / frames * 10
+        return successRates, precisions, overlapScores, errorNums
+
+    def curves(self, finished=False):
+        """Get the curves of the sequences with scored frames.
+
+        Args:
+            finished: True to get only the sequences scored completely.
+
+        Returns:
+            A dictionary which maps sequence names to their curves, as
+            calc_seq_curves() returns them, for calc_scores().
+        """
+        successRates, precisions, overlapScores, errorNums = self.seq_curves()
+        scored = self.done if finished else self.frames > 0
+        return dict((self.seqs[i].name, (successRates[i], precisions[i],
+            float(overlapScores[i]), float(errorNums[i])))
+            for i in np.flatnonzero(scored))
+
+    def attr_curves(self, expression='ALL'):
+        """Get the partial curves of an attribute.
+
+        Args:
+            expression: An attribute, 'ALL', or a combination such as
+                'OCC AND FM', see AttributeIndex.select().
+
+        Returns:
+            A tuple (successRateList, precisionList), the mean curves of the
+            attribute's sequences which have scored frames, or None if none
+            have.
+        """
+        idx = self.attrIndex.select(expression)
+        idx = idx[self.frames[idx] > 0]
+        if len(idx) == 0:
+            return None
+        successRates, precisions, _, _ = self.seq_curves()
+        return successRates[idx].mean(axis=0), precisions[idx].mean(axis=0)
+
+    def auc(self, expression='ALL'):
+        """Get the area under the partial success curve of an attribute."""
+        curves = self.attr_curves(expression)
+        if curves is None:
+            return None
+        return float(curves[0].mean())
+
+    def get_scores(self, attrExprs=[], finished=False):
+        """Get the partial scores of the attributes and ALL.
+
+        Args:
+            attrExprs: Combinations of attributes, see calc_scores().
+            finished: True to score only the sequences scored completely.
+
+        Returns:
+            A list of scripts.model.score.Score objects, like calc_result()
+            returns, over the sequences with scored frames.
+        """
+        return scripts.butil.eval_results.calc_scores(self.tracker, self.seqs,
+            self.evalType, self.curves(finished), attrExprs)
+
+    def hopeless(self):
+        """Check if the tracker is below EARLY_ABORT_AUC.
+
+        Returns:
+            True if EARLY_ABORT_AUC is set, at least EARLY_ABORT_MIN_SEQS
+            sequences are done, and their success AUC is below it.
+        """
+        if config.EARLY_ABORT_AUC is None:
+            return False
+        done = np.flatnonzero(self.done)
+        if len(done) < max(config.EARLY_ABORT_MIN_SEQS, 1):
+            return False
+        successRates = self.seq_curves()[0]
+        return float(successRates[done].mean()) < config.EARLY_ABORT_AUC
+
+    def _add(self, i, errCoverage, errCenter):
+        errCoverage = np.asarray(errCoverage, dtype=np.float64)
+        errCenter = np.asarray(errCenter, dtype=np.float64)
+        sortedCoverage = np.sort(errCoverage)
+        sortedCenter = np.sort(errCenter)
+        self.frames[i] += len(errCoverage)
+        self.above[i] += len(sortedCoverage) - np.searchsorted(
+            sortedCoverage, self._overlapThresholds, side='right')
+        self.atMost[i] += np.searchsorted(sortedCenter,
+            self._errorThresholds, side='right')
+        positive = errCoverage[errCoverage > 0]
+        # added one at a time, like calc_seq_curves(), so the mean overlap
+        # is the same to the last digit
+        self.overlapSum[i] = scripts.butil.calc_seq_err_robust.sequential_sum(
+            np.concatenate([[self.overlapSum[i]], positive]))
+        self.overlapCount[i] += len(positive)
+        self.failures[i] += np.searchsorted(sortedCoverage, 0.5, side='left')
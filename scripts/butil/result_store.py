@@ -0,0 +1,322 @@
+"""A columnar, memory-mappable store for tracking results.
+
+Each tracker and evaluation type has one store, in the tracker's result
+directory:
+
+    results/<evalType>/<tracker>/res.bin      the raw 'res' arrays
+    results/<evalType>/<tracker>/index.jsonl  one line per result
+
+An index line holds the Result fields other than 'res', the sequence name,
+the segment (the position of the result in the sequence's list), and the
+offset, shape, and dtype of its 'res' array in res.bin. Each array starts at
+a multiple of 8 bytes. Saving a sequence appends its arrays and then its index
+lines; if the sequence was saved before, the new lines replace the old ones
+when the store is loaded, once all of them are there. compact() drops the
+replaced arrays.
+
+Loaded results have 'res' as a read-only NumPy view of the memory-mapped
+file, so loading doesn't parse or build per-frame Python objects. The old
+per-sequence JSON files can be imported, and exported for other tools.
+
+usage : python -m scripts.butil.result_store -e <evaltype> -t <trackers>
+            (--import | --export | --compact)
+"""
+
+import collections
+import getopt
+import json
+import os
+import sys
+
+import numpy as np
+
+import config
+from scripts.model.result import Result
+
+DATA_FILE = 'res.bin'
+INDEX_FILE = 'index.jsonl'
+
+# The Result fields which are kept in the index.
+FIELDS = ['tracker', 'seqName', 'startFrame', 'endFrame', 'evalType', 'fps',
+    'timing', 'shiftType', 'resType', 'tmplsize']
+
+# The parsed index files, by path, with the size and modification time they
+# were parsed at
+_index_cache = {}
+
+
+def get_store_dir(evalType, tracker):
+    """Get the directory of a tracker's results."""
+    return os.path.join(config.RESULT_SRC.format(evalType), tracker)
+
+
+def has_store(evalType, tracker):
+    """Check if a tracker has a result store for an evaluation type."""
+    return os.path.exists(
+        os.path.join(get_store_dir(evalType, tracker), INDEX_FILE))
+
+
+def save(results, tracker=None):
+    """Append the results of one tracker on one sequence to its store.
+
+    Args:
+        results: A list of scripts.model.result.Result objects for the same
+            tracker, sequence, and evaluation type, in segment order.
+        tracker: The store to append to. The default is the tracker of the
+            results.
+    """
+    if tracker is None:
+        tracker = results[0].tracker
+    evalType = results[0].evalType
+    src = get_store_dir(evalType, tracker)
+    if not os.path.exists(src):
+        os.makedirs(src)
+    lines = []
+    dataFile = open(os.path.join(src, DATA_FILE), 'ab')
+    try:
+        # Offsets count 8 byte words, so each array is aligned. An
+        # interrupted save may have left a partial word.
+        offset = -(-dataFile.seek(0, os.SEEK_END) // 8)
+        dataFile.write(bytes(offset * 8 - dataFile.tell()))
+        for segment, result in enumerate(results):
+            res = np.ascontiguousarray(result.res)
+            if res.dtype.kind not in 'biuf':
+                res = res.astype(np.float64)
+            data = res.tobytes()
+            dataFile.write(data + bytes(-len(data) % 8))
+            record = collections.OrderedDict(
+                (f, _to_json(getattr(result, f, None))) for f in FIELDS)
+            record['segment'] = segment
+            record['count'] = len(results)
+            record['offset'] = offset
+            record['shape'] = list(res.shape)
+            record['dtype'] = res.dtype.str
+            lines.append(json.dumps(record) + '\n')
+            offset += -(-len(data) // 8)
+    finally:
+        dataFile.close()
+    # The index lines go last, so they never point past the data.
+    indexFile = open(os.path.join(src, INDEX_FILE), 'a')
+    try:
+        indexFile.write(''.join(lines))
+    finally:
+        indexFile.close()
+
+
+def load(evalType, tracker):
+    """Load all the results in a tracker's store.
+
+    Returns:
+        An OrderedDict which maps sequence names to lists of Result objects,
+        in segment order. Each 'res' is a read-only view of the data file,
+        with the dtype it was saved with.
+    """
+    src = get_store_dir(evalType, tracker)
+    records = _read_index(src)
+    data = _map_data(src)
+    results = collections.OrderedDict()
+    for seqName, seqRecords in records.items():
+        results[seqName] = [_make_result(r, data) for r in seqRecords]
+    return results
+
+
+def load_seq(evalType, tracker, seqName):
+    """Load the results of a tracker on one sequence.
+
+    Returns:
+        A list of Result objects in segment order, or None if the store has
+        no results for the sequence.
+    """
+    src = get_store_dir(evalType, tracker)
+    seqRecords = _read_index(src).get(seqName)
+    if seqRecords is None:
+        return None
+    data = _map_data(src)
+    return [_make_result(r, data) for r in seqRecords]
+
+
+def seq_names(evalType, tracker):
+    """Get the names of the sequences in a tracker's store."""
+    return list(_read_index(get_store_dir(evalType, tracker)))
+
+
+def compact(evalType, tracker):
+    """Rewrite a tracker's store without the arrays of replaced results."""
+    results = load(evalType, tracker)
+    for seqResults in results.values():
+        for result in seqResults:
+            result.res = np.array(result.res)
+    src = get_store_dir(evalType, tracker)
+    for name in [DATA_FILE, INDEX_FILE]:
+        path = os.path.join(src, name)
+        os.replace(path, path + '.old')
+    for seqResults in results.values():
+        save(seqResults, tracker)
+    for name in [DATA_FILE, INDEX_FILE]:
+        os.remove(os.path.join(src, name + '.old'))
+
+
+def import_json(evalType, tracker):
+    """Add a tracker's per-sequence JSON result files to its store.
+
+    Returns:
+        The names of the imported sequences.
+    """
+    src = get_store_dir(evalType, tracker)
+    names = []
+    for fileName in sorted(os.listdir(src)):
+        if not fileName.endswith('.json'):
+            continue
+        resultFile = open(os.path.join(src, fileName))
+        jsonList = json.load(resultFile)
+        resultFile.close()
+        if type(jsonList) is dict:
+            jsonList = [jsonList]
+        save([Result(**j) for j in jsonList], tracker)
+        names.append(fileName[:-len('.json')])
+    return names
+
+
+def export_json(evalType, tracker, dst=None):
+    """Write a tracker's stored results as per-sequence JSON files.
+
+    The files have the format which save_seq_result() used to write.
+
+    Args:
+        dst: The directory for the files. The default is the tracker's
+            result directory.
+
+    Returns:
+        The paths of the written files.
+    """
+    if dst is None:
+        dst = get_store_dir(evalType, tracker)
+    if not os.path.exists(dst):
+        os.makedirs(dst)
+    paths = []
+    for seqName, seqResults in load(evalType, tracker).items():
+        path = os.path.join(dst, '{0}.json'.format(seqName))
+        resultFile = open(path, 'w')
+        resultFile.write(json.dumps([to_json_dict(r) for r in seqResults]))
+        resultFile.close()
+        paths.append(path)
+    return paths
+
+
+def to_json_dict(result):
+    """Get a Result's fields with 'res' as nested lists, for JSON."""
+    d = collections.OrderedDict(
+        (k, _to_json(v)) for k, v in result.to_dict().items())
+    d['res'] = np.asarray(result.res).tolist()
+    return d
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _read_index(src):
+    # The parsed index is cached until the file changes; callers must not
+    # modify it.
+    path = os.path.join(src, INDEX_FILE)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return collections.OrderedDict()
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _index_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    records = collections.OrderedDict()
+    # the lines of saves whose lines aren't all read yet, by sequence
+    pending = {}
+    indexFile = open(path)
+    for line in indexFile:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # a line which a save is still writing
+            continue
+        seqName = record['seqName']
+        if record['segment'] == 0:
+            pending[seqName] = []
+        seqRecords = pending.get(seqName)
+        if seqRecords is None or record['segment'] != len(seqRecords):
+            pending.pop(seqName, None)
+            continue
+        seqRecords.append(record)
+        if len(seqRecords) == record['count']:
+            # A complete new save of the sequence replaces the previous one.
+            # An interrupted save never completes, so the previous one stays.
+            records.pop(seqName, None)
+            records[seqName] = pending.pop(seqName)
+    indexFile.close()
+    _index_cache[path] = (key, records)
+    return records
+
+
+def _map_data(src):
+    path = os.path.join(src, DATA_FILE)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+def _make_result(record, data):
+    # Records without a dtype were saved as float64.
+    res = np.ndarray(tuple(record['shape']),
+        dtype=np.dtype(record.get('dtype', '<f8')), buffer=data,
+        offset=record['offset'] * 8)
+    fields = dict((f, record.get(f)) for f in FIELDS)
+    return Result(res=res, **fields)
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "he:t:", ["evaltype=", "tracker=",
+            "import", "export", "compact"])
+    except getopt.GetoptError:
+        print(__doc__.split('usage : ')[1])
+        sys.exit(1)
+    evalTypes = ['OPE', 'SRE', 'TRE']
+    trackers = None
+    action = None
+    for opt, arg in opts:
+        if opt == '-h':
+            print(__doc__.split('usage : ')[1])
+            sys.exit(0)
+        elif opt in ("-e", "--evaltype"):
+            evalTypes = [x.strip() for x in arg.split(',')]
+        elif opt in ("-t", "--tracker"):
+            trackers = [x.strip() for x in arg.split(',')]
+        else:
+            action = opt[2:]
+    if action is None:
+        print(__doc__.split('usage : ')[1])
+        sys.exit(1)
+    for evalType in evalTypes:
+        src = config.RESULT_SRC.format(evalType)
+        if not os.path.exists(src):
+            continue
+        for tracker in trackers or sorted(os.listdir(src)):
+            if not os.path.isdir(os.path.join(src, tracker)):
+                continue
+            if action == 'import':
+                names = import_json(evalType, tracker)
+                print(f'{evalType} {tracker}: imported {len(names)} sequences')
+            elif action == 'export':
+                paths = export_json(evalType, tracker)
+                print(f'{evalType} {tracker}: exported {len(paths)} sequences')
+            elif action == 'compact' and has_store(evalType, tracker):
+                compact(evalType, tracker)
+                print(f'{evalType} {tracker}: compacted')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,333 @@
+"""Schedule tracker runs as independent jobs on a pool of worker processes.
+
+A benchmark sweep is broken into one job per (tracker, sequence, sub-sequence)
+triple. Jobs run on a process pool, subject to per-tracker concurrency limits,
+and the results are assembled back into the per-sequence lists that
+scripts.butil.load_results.save_seq_result() expects.
+
+The jobs of MATLAB trackers run on a pool of their own, with
+config.MATLAB_ENGINES processes besides the workers of the other jobs. Each of them keeps one warm engine, see
+scripts/bscripts/matlab_pool.py, so engines are started, and tracker
+directories added to their paths, once per process instead of in whichever
+worker happens to get a MATLAB job.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import os
+import sys
+
+import config
+import scripts.bscripts.registry
+import scripts.butil.seq_config
+from scripts.model.result import Result
+
+Job = collections.namedtuple(
+    "Job",
+    [
+        "order",
+        "tracker",
+        "seq_name",
+        "seq_index",
+        "sub_index",
+        "sub_count",
+        "sub_seq",
+        "eval_type",
+        "shift_type",
+        "result_path",
+    ],
+)
+Job.__doc__ = """One tracker run on one sub-sequence.
+
+The order field is the position of the job in the serial sweep. Jobs are
+submitted in this order whenever the concurrency limits allow it.
+"""
+
+
+def make_jobs(trackers, seqs, evalType, shiftTypeSet, skip=None):
+    """Break a sweep into jobs.
+
+    Args:
+        trackers: A list of tracker names.
+        seqs: A list of scripts.model.sequence.Sequence objects.
+        evalType: The evaluation type; 'OPE', 'SRE', or 'TRE'.
+        shiftTypeSet: The SRE shift types, indexed by sub-sequence.
+        skip: An optional function skip(tracker, seq). If it returns True, no
+            jobs are made for that tracker and sequence.
+
+    Returns:
+        A list of Job objects in serial sweep order.
+    """
+    tmpRes_path = config.RESULT_SRC.format("tmp/{0}/".format(evalType))
+    if not os.path.exists(tmpRes_path):
+        os.makedirs(tmpRes_path)
+    jobs = []
+    # The SRE init rects of all the sequences are shifted at once.
+    allSubSeqs = scripts.butil.seq_config.get_all_sub_seqs(seqs, 20.0,
+        evalType, shiftTypeSet)
+    for idxSeq, s in enumerate(seqs):
+        subSeqs, _ = allSubSeqs[idxSeq]
+        for t in trackers:
+            if skip is not None and skip(t, s):
+                continue
+            for idx, subS in enumerate(subSeqs):
+                subS.name = s.name + "_" + str(idx)
+                shiftType = shiftTypeSet[idx] if evalType == "SRE" else None
+                rp = tmpRes_path + "_" + t + "_" + str(idx + 1) + "/"
+                jobs.append(
+                    Job(
+                        len(jobs),
+                        t,
+                        s.name,
+                        idxSeq,
+                        idx,
+                        len(subSeqs),
+                        subS,
+                        evalType,
+                        shiftType,
+                        rp,
+                    )
+                )
+    return jobs
+
+
+def run_job(job):
+    """Run one job.
+
+    This runs in a worker process or thread, so it must not depend on state
+    of the parent process other than the job itself. In particular, it does
+    not change the working directory.
+
+    Args:
+        job: The Job to run.
+
+    Returns:
+        A tuple (result, error). On success, result is a
+        scripts.model.result.Result and error is None. On failure, result is
+        None and error describes the exception.
+    """
+    t = job.tracker
+    subS = job.sub_seq
+    rp = job.result_path
+    print(f'{t}, {job.seq_index + 1}_{job.seq_name}:{job.sub_index + 1}/'
+        f'{job.sub_count} - {job.eval_type}')
+    if config.SAVE_IMAGE and not os.path.exists(rp):
+        os.makedirs(rp, exist_ok=True)
+    workdir = get_tracker_dir(t)
+    try:
+        run = scripts.bscripts.registry.get_tracker(t)
+        res = run(subS, os.path.abspath(rp), config.SAVE_IMAGE, workdir)
+    except:
+        return None, str(sys.exc_info())
+    resType = res.get('type', scripts.bscripts.registry.get_info(t).result_type)
+    r = Result(t, job.seq_name, subS.startFrame, subS.endFrame, resType,
+        job.eval_type, res['res'], res['fps'], job.shift_type,
+        timing=res.get('timing'))
+    try: r.tmplsize = res['tmplsize'][0]
+    except: pass
+    return r, None
+
+
+def get_tracker_dir(tracker):
+    """Get the absolute path of a tracker's directory.
+
+    The tracker adapters get this directory explicitly, instead of relying on
+    the working directory of the process.
+
+    Args:
+        tracker: The name of the tracker.
+
+    Returns:
+        The absolute path of the tracker's directory in config.TRACKER_SRC.
+    """
+    return os.path.normpath(
+        os.path.join(config.WORKDIR, config.TRACKER_SRC, tracker)
+    )
+
+
+def get_job_limit(tracker):
+    """Get the concurrency limit which applies to a tracker.
+
+    Args:
+        tracker: The name of the tracker.
+
+    Returns:
+        A tuple (key, limit). Trackers with the same key share the limit.
+        The limit is None if the tracker is only limited by the pool size.
+        Limits in config.TRACKER_JOB_LIMITS override the registry.
+    """
+    info = scripts.bscripts.registry.get_info(tracker)
+    key = info.group or tracker
+    return key, config.TRACKER_JOB_LIMITS.get(key, info.max_jobs)
+
+
+def run_jobs(jobs, num_workers=1, on_sequence_done=None, keep_results=True):
+    """Run jobs and assemble their results.
+
+    With one worker, the jobs run serially in this process. Otherwise they
+    run on a process pool of num_workers processes, and the MATLAB jobs on a
+    pool of config.MATLAB_ENGINES processes. If a job fails, the
+    remaining jobs for the same tracker and sequence are not run, just like
+    the original serial loop.
+
+    Args:
+        jobs: A list of Job objects, as returned by make_jobs().
+        num_workers: The maximum number of jobs to run at once, not counting
+            MATLAB jobs. With more than one, a sweep with MATLAB trackers
+            starts num_workers + config.MATLAB_ENGINES processes.
+        on_sequence_done: An optional function
+            on_sequence_done(tracker, seq_index, results). It is called as
+            soon as every job for a tracker and sequence has finished. The
+            results are in sub-sequence order. If it returns True, the
+            tracker's remaining jobs are cancelled.
+        keep_results: False to drop each sequence's results once
+            on_sequence_done has been called, for callers which save and
+            score them there.
+
+    Returns:
+        A dictionary mapping (tracker, seq_index) to the list of Result
+        objects for that tracker and sequence, in sub-sequence order. The
+        sequences of a cancelled tracker which didn't finish have empty
+        lists, and so do all the sequences if keep_results is False.
+    """
+    assembly = _Assembly(jobs, on_sequence_done, keep_results)
+    if num_workers <= 1:
+        for job in jobs:
+            if assembly.failed(job):
+                assembly.skip(job)
+                continue
+            assembly.add(job, *run_job(job))
+        return assembly.results
+
+    queues = collections.OrderedDict()
+    for job in jobs:
+        key, _ = get_job_limit(job.tracker)
+        queues.setdefault(key, collections.deque()).append(job)
+    running = collections.Counter()
+    # The jobs running on each pool, by whether the pool runs MATLAB jobs
+    busy = collections.Counter()
+    sizes = {False: num_workers, True: max(config.MATLAB_ENGINES, 1)}
+    with contextlib.ExitStack() as stack:
+        pools = {}
+        for matlab in set(_needs_matlab(job) for job in jobs):
+            pools[matlab] = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(sizes[matlab]))
+        futures = {}
+        while queues or futures:
+            while True:
+                job = _next_job(queues, running,
+                    lambda j: busy[_needs_matlab(j)] < sizes[_needs_matlab(j)])
+                if job is None:
+                    break
+                if assembly.failed(job):
+                    assembly.skip(job)
+                    continue
+                running[get_job_limit(job.tracker)[0]] += 1
+                busy[_needs_matlab(job)] += 1
+                futures[pools[_needs_matlab(job)].submit(run_job, job)] = job
+            if not futures:
+                continue
+            done, _ = concurrent.futures.wait(
+                futures, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in sorted(done, key=lambda f: futures[f].order):
+                job = futures.pop(future)
+                running[get_job_limit(job.tracker)[0]] -= 1
+                busy[_needs_matlab(job)] -= 1
+                try:
+                    result, error = future.result()
+                except concurrent.futures.process.BrokenProcessPool:
+                    raise
+                except Exception:  # pylint: disable=broad-except
+                    result, error = None, str(sys.exc_info())
+                assembly.add(job, result, error)
+    return assembly.results
+
+
+def _next_job(queues, running, has_room=None):
+    """Pop the earliest queued job whose concurrency limit is not reached.
+
+    has_room is an optional function has_room(job), which checks if the pool
+    the job would run on has an idle process.
+    """
+    best = None
+    for key, queue in queues.items():
+        limit = get_job_limit(queue[0].tracker)[1]
+        if limit is not None and running[key] >= limit:
+            continue
+        if has_room is not None and not has_room(queue[0]):
+            continue
+        if best is None or queue[0].order < queues[best][0].order:
+            best = key
+    if best is None:
+        return None
+    job = queues[best].popleft()
+    if not queues[best]:
+        del queues[best]
+    return job
+
+
+def _needs_matlab(job):
+    return scripts.bscripts.registry.get_info(job.tracker).needs_matlab
+
+
+class _Assembly:
+    """Collect job results into per-sequence lists in sub-sequence order."""
+
+    def __init__(self, jobs, on_sequence_done, keep_results=True):
+        self.results = collections.OrderedDict()
+        self._keep_results = keep_results
+        self._slots = {}
+        self._pending = collections.Counter()
+        self._failures = {}
+        self._cancelled = set()
+        self._on_sequence_done = on_sequence_done
+        for job in jobs:
+            key = (job.tracker, job.seq_index)
+            if key not in self._slots:
+                self._slots[key] = [None] * job.sub_count
+                self.results[key] = []
+            self._pending[key] += 1
+
+    def failed(self, job):
+        """Check if an earlier job for the same tracker and sequence failed.
+
+        Jobs of a cancelled tracker count as failed, too.
+        """
+        if job.tracker in self._cancelled:
+            return True
+        failure = self._failures.get((job.tracker, job.seq_index))
+        return failure is not None and failure < job.sub_index
+
+    def skip(self, job):
+        """Account for a job which will not be run."""
+        self._finish((job.tracker, job.seq_index))
+
+    def add(self, job, result, error):
+        """Record the outcome of a job."""
+        key = (job.tracker, job.seq_index)
+        if error is not None:
+            print(f'failed to execute {job.tracker} : {error}')
+            failure = self._failures.get(key)
+            if failure is None or job.sub_index < failure:
+                self._failures[key] = job.sub_index
+        else:
+            self._slots[key][job.sub_index] = result
+        self._finish(key)
+
+    def _finish(self, key):
+        self._pending[key] -= 1
+        if self._pending[key] > 0:
+            return
+        slots = self._slots.pop(key)
+        end = self._failures.get(key, len(slots))
+        self.results[key] = slots[:end]
+        if None in self.results[key]:
+            # skipped because the tracker was cancelled
+            self.results[key] = []
+        if self._on_sequence_done is not None:
+            if self._on_sequence_done(key[0], key[1], self.results[key]):
+                self._cancelled.add(key[0])
+        if not self._keep_results:
+            self.results[key] = []
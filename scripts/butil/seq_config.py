@@ -1,17 +1,19 @@
-import urllib.request
-import zipfile
-import shutil
-import copy
-
-from PIL import Image
 
 from config import *
 from scripts import *
 import scripts.butil
+import scripts.butil.image_size
+import scripts.butil.shift_bbox
 import scripts.butil.split_seq
+import scripts.butil.gt_store
+import scripts.butil.catalog
+import scripts.butil.downloader
 import scripts.model.sequence
 
-def get_sub_seqs(s, numSeg, evalType):
+def get_sub_seqs(s, numSeg, evalType, shiftTypes=None, shiftRects=None):
+    # shiftTypes are the SRE shift types, shiftTypeSet by default, and
+    # shiftRects the shifted init rects, if get_all_sub_seqs() computed them
+    # for many sequences at once.
     s.len = s.endFrame - s.startFrame + 1
     s.s_frames = [None] * s.len
 
@@ -34,31 +36,54 @@ def get_sub_seqs(s, numSeg, evalType):
         subAnno.append(subA)
 
     elif evalType == 'SRE':
-        subS = subSeqs[0]
-        subA = subAnno[0]
-        subSeqs = []
-        subAnno = []
-        r = subS.init_rect
-        img = Image.open(s.s_frames[0])
-        (imgWidth, imgHeight) = img.size
-        for i in range(len(shiftTypeSet)):
-            s = copy.deepcopy(subS)
-            shiftType = shiftTypeSet[i]
-            s.init_rect = scripts.butil.shift_init_BB(s.init_rect, shiftType, 
-                imgHeight, imgWidth)
-            s.shiftType = shiftType
-            subSeqs.append(s)
-            subAnno.append(subA)
+        if shiftTypes is None:
+            shiftTypes = shiftTypeSet
+        if shiftRects is None:
+            shiftRects = scripts.butil.shift_bbox.shift_init_BBs(
+                [subSeqs[0].init_rect], shiftTypes,
+                [scripts.butil.image_size.seq_size(s)])[0]
+        subSeqs, subAnno = _shift_sub_seqs(subSeqs[0], subAnno[0],
+            shiftTypes, shiftRects)
+    return subSeqs, subAnno
+
+def get_all_sub_seqs(seqs, numSeg, evalType, shiftTypes=None):
+    # Like get_sub_seqs() for each sequence, but the SRE init rects of all
+    # the sequences are shifted with one call of shift_init_BBs().
+    if evalType != 'SRE':
+        return [get_sub_seqs(s, numSeg, evalType) for s in seqs]
+    if not seqs:
+        return []
+    if shiftTypes is None:
+        shiftTypes = shiftTypeSet
+    firsts = [get_sub_seqs(s, numSeg, 'OPE') for s in seqs]
+    shiftRects = scripts.butil.shift_bbox.shift_init_BBs(
+        [subSeqs[0].init_rect for subSeqs, _ in firsts], shiftTypes,
+        [scripts.butil.image_size.seq_size(s) for s in seqs])
+    return [_shift_sub_seqs(subSeqs[0], subAnno[0], shiftTypes, rects)
+        for (subSeqs, subAnno), rects in zip(firsts, shiftRects)]
+
+def _shift_sub_seqs(subS, subA, shiftTypes, shiftRects):
+    subSeqs = [subS.shifted([int(x) for x in r], shiftType)
+        for shiftType, r in zip(shiftTypes, shiftRects)]
+    subAnno = [subA] * len(subSeqs)
     return subSeqs, subAnno
 
 def setup_seqs(loadSeqs):
-    seqs = make_seq_configs(loadSeqs)
+    # Only the sequences whose files changed since they were put in the
+    # catalog are set up again.
+    names = [x for x in get_seq_names(loadSeqs)
+        if scripts.butil.catalog.get_seq(x) is None]
+    seqs = make_seq_configs(names)
     for seq in seqs:
         print("\t" + seq.name + "\t" + seq.path)
         save_seq_config(seq)
+    scripts.butil.catalog.put_seqs(seqs)
 
 def save_seq_config(seq):
-    string = json.dumps(seq.__dict__, indent=2)
+    # The ground truth is kept in scripts.butil.gt_store.
+    cfg = seq.to_dict()
+    del cfg['gtRect']
+    string = json.dumps(cfg, indent=2)
     src = os.path.join(SEQ_SRC, seq.name)
     configFile = open(src+'/cfg.json', 'w')
     configFile.write(string)
@@ -69,7 +94,12 @@ def load_seq_config(seqName):
     configFile = open(src+'/cfg.json')
     string = configFile.read()
     j = json.loads(string)
-    seq = scripts.model.sequence.Sequence(**j)
+    j.pop('gtRect', None)
+    gtRect = scripts.butil.gt_store.get_gt(seqName)
+    if gtRect is None:
+        scripts.butil.gt_store.update([seqName])
+        gtRect = scripts.butil.gt_store.get_gt(seqName)
+    seq = scripts.model.sequence.Sequence(gtRect=gtRect, **j)
     seq.path = os.path.join(os.path.abspath(seq.path), '')
     return seq
 
@@ -82,36 +112,57 @@ def load_all_seq_configs():
     return seqs
 
 def load_seq_configs(seqNames):
-    return [load_seq_config(x) for x in seqNames]
+    seqs = []
+    for name in seqNames:
+        entry = scripts.butil.catalog.get_seq(name)
+        if entry is None:
+            seqs.append(load_seq_config(name))
+        else:
+            seqs.append(scripts.butil.catalog.make_seq(entry))
+    return seqs
 
 def get_seq_names(loadSeqs):
     if type(loadSeqs) is list:
         return loadSeqs
     if loadSeqs.lower() == 'all':
-        names =  os.listdir(SEQ_SRC)
-        names.remove(ATTR_LIST_FILE)
-        names.remove(ATTR_DESC_FILE)
-        names.remove(TB_50_FILE)
-        names.remove(TB_100_FILE)
+        names = sorted(x.name for x in os.scandir(SEQ_SRC) if x.is_dir())
     elif loadSeqs.lower() == 'tb50':
-        tb_50 = open(SEQ_SRC+TB_50_FILE)
-        seq_list = tb_50.readlines()
-        names = sorted([x.split('\t')[0].strip() for x in seq_list])
+        names = read_seq_list(TB_50_FILE)
     elif loadSeqs.lower() == 'tb100':
-        tb_100 = open(SEQ_SRC+TB_100_FILE)
-        seq_list = tb_100.readlines()
-        names = sorted([x.split('\t')[0].strip() for x in seq_list])
+        names = read_seq_list(TB_100_FILE)
     elif loadSeqs.lower() == 'cvpr13':
-        cvpr13 = open(SEQ_SRC+CVPR_13_FILE)
-        seq_list = cvpr13.readlines()
-        names = sorted([x.split('\t')[0].strip() for x in seq_list])
+        names = read_seq_list(CVPR_13_FILE)
     else:
         names = loadSeqs
     return names
 
+def read_seq_list(fileName):
+    names = scripts.butil.catalog.get_list(fileName)
+    if names is None:
+        listFile = open(SEQ_SRC+fileName)
+        seq_list = listFile.readlines()
+        listFile.close()
+        names = sorted([x.split('\t')[0].strip() for x in seq_list])
+        scripts.butil.catalog.put_list(fileName, names)
+    return names
+
 def make_seq_configs(loadSeqs):
     names = get_seq_names(loadSeqs)
     seqList = []
+    gtNames = []
+    missing = [x for x in names if not os.path.exists(SEQ_SRC + x + '/img/')]
+    for name in missing:
+        print(name + ' does not have img directory')
+    if missing:
+        if DOWNLOAD_SEQS:
+            # The archives are downloaded at once, see
+            # scripts.butil.downloader.
+            scripts.butil.downloader.download_sequences(missing)
+        else:
+            print('If you want to download sequences,\n' \
+                + 'check if config.py\'s DOWNLOAD_SEQS is True')
+            sys.exit(1)
+
     for name in names:  
         src = SEQ_SRC + name
         imgSrc = src + '/img/'
@@ -119,15 +170,6 @@ def make_seq_configs(loadSeqs):
         path = imgSrc
         if not os.path.exists(src):
             os.makedirs(src)
-        if not os.path.exists(imgSrc):
-            print(name + ' does not have img directory')
-            if DOWNLOAD_SEQS:
-                download_sequence(name)
-            else:
-                print('If you want to download sequences,\n' \
-                    + 'check if config.py\'s DOWNLOAD_SEQS is True')
-                sys.exit(1)
-
         imgfiles = sorted(os.listdir(imgSrc))
         imgfiles = [x for x in imgfiles if x.split('.')[1] in ['jpg', 'png']]
         nz, ext, startFrame, endFrame = get_format(name, imgfiles)
@@ -154,24 +196,19 @@ def make_seq_configs(loadSeqs):
 
         imgFormat = "{0}{1}{2}{3}".format("{0:0",nz,"d}.",ext)
 
-        gtFile = open(os.path.join(src, GT_FILE))
-        gtLines = gtFile.readlines()
-        gtRect = []
-        for line in gtLines:
-            if '\t' in line:
-                gtRect.append([int(x) for x in line.strip().split("\t")])
-                #gtRect.append(map(int,line.strip().split('\t')))
-            elif ',' in line:
-                gtRect.append([int(x) for x in line.strip().split(",")])
-                #gtRect.append(map(int,line.strip().split(',')))
-            elif ' ' in line:
-                gtRect.append([int(x) for x in line.strip().split(" ")])
-                #gtRect.append(map(int,line.strip().split(' ')))
-
         init_rect = [0,0,0,0]
+        # only the image header is read, see scripts.butil.image_size
+        width, height = scripts.butil.image_size.read_size(
+            imgSrc + imgFormat.format(startFrame))
         seq = scripts.model.sequence.Sequence(name, path, startFrame, endFrame,
-            attributes, nz, ext, imgFormat, gtRect, init_rect)
+            attributes, nz, ext, imgFormat, None, init_rect, width, height)
         seqList.append(seq)
+        gtNames.append(name)
+
+    # Parse the ground truth files which changed into the shared store.
+    scripts.butil.gt_store.update(gtNames)
+    for seq in seqList:
+        seq.gtRect = scripts.butil.gt_store.get_gt(seq.name)
     return seqList
 
 def get_format(name, imgfiles):
@@ -192,91 +229,3 @@ def get_format(name, imgfiles):
     elif name == "Diving":
         endFrame = 215
     return nz, ext, startFrame, endFrame
-
-def download_sequence(seqName):
-    file_name = SEQ_SRC + seqName + '.zip'
-
-    if seqName == 'Jogging-1' or seqName == 'Jogging-2':
-        url = DOWNLOAD_URL.format('Jogging')
-        download_and_extract_file(url, file_name, SEQ_SRC)
-        src = SEQ_SRC + 'Jogging/'
-        dst1 = SEQ_SRC + 'Jogging-1/'
-        dst2 = SEQ_SRC + 'Jogging-2/'
-        if not os.path.exists(dst1 + 'img'):
-            shutil.copytree(src + 'img', dst1 + 'img')
-        if not os.path.exists(dst2 + 'img'):
-            shutil.copytree(src + 'img', dst2 + 'img')
-        shutil.move(src + 'groundtruth_rect.1.txt', dst1 + GT_FILE)
-        shutil.move(src + 'groundtruth_rect.2.txt', dst2 + GT_FILE)
-        shutil.move(src + 'jogging-1.txt', dst1 + INIT_OMIT_FILE)
-        shutil.move(src + 'jogging-2.txt', dst2 + INIT_OMIT_FILE)
-        shutil.rmtree(src)
-
-    elif seqName == 'Skating2-1' or seqName == 'Skating2-2':
-        url = DOWNLOAD_URL.format('Skating2')
-        download_and_extract_file(url, file_name, SEQ_SRC)
-        src = SEQ_SRC + 'Skating2/'
-        dst1 = SEQ_SRC + 'Skating2-1/'
-        dst2 = SEQ_SRC + 'Skating2-2/'
-        if not os.path.exists(dst1 + 'img'):
-            shutil.copytree(src + 'img', dst1 + 'img')
-        if not os.path.exists(dst2 + 'img'):
-            shutil.copytree(src + 'img', dst2 + 'img')
-        shutil.move(src + 'groundtruth_rect.1.txt', dst1 + GT_FILE)
-        shutil.move(src + 'groundtruth_rect.2.txt', dst2 + GT_FILE)
-        shutil.rmtree(src)
-
-    elif seqName == 'Human4-1' or seqName == 'Human4-2':
-        url = DOWNLOAD_URL.format('Human4')
-        download_and_extract_file(url, file_name, SEQ_SRC)
-        src = SEQ_SRC + 'Human4/'
-        # dst1 = SEQ_SRC + 'Human4-1/'
-        dst2 = SEQ_SRC + 'Human4-2/'
-        # if not os.path.exists(dst1 + 'img'):
-        #     shutil.copytree(src + 'img', dst1 + 'img')
-        if not os.path.exists(dst2 + 'img'):
-            shutil.copytree(src + 'img', dst2 + 'img')
-        # shutil.move(src + 'groundtruth_rect.1.txt', dst1 + GT_FILE)
-        shutil.move(src + 'groundtruth_rect.2.txt', dst2 + GT_FILE)
-        shutil.rmtree(src)
-
-    else:
-        url = DOWNLOAD_URL.format(seqName)
-        download_and_extract_file(url, file_name, SEQ_SRC)
-            
-    if os.path.exists(SEQ_SRC + '__MACOSX'):
-        shutil.rmtree(SEQ_SRC + '__MACOSX')
-        
-
-def download_and_extract_file(url, dst, ext_dst):  
-    print('Connecting to {url} ...')
-    try:
-        u = urllib.request.urlopen(url)
-    except:
-        print('Cannot download {url.split("/")[-1]} : {sys.exc_info()[1]}')
-        sys.exit(1)
-    f = open(dst, 'wb')
-    meta = u.info()
-    file_size = int(meta.getheaders("Content-Length")[0])
-    print("Downloading {url.split('/')[-1]} ({file_size} Bytes)..")
-    file_size_dl = 0
-    block_sz = 8192
-    while True:
-        buffer = u.read(block_sz)
-        if not buffer:
-            break
-
-        file_size_dl += len(buffer)
-        f.write(buffer)
-        status = r"{0:d} ({1:3.2f}%)".format(
-            file_size_dl, file_size_dl * 100. / file_size)
-        status = status + chr(8)*(len(status)+1)
-        print(status)
-    f.close()
-
-    f = open(dst, 'rb')
-    z = zipfile.ZipFile(f)
-    print('\nExtracting {url.split("/")[-1]}...')
-    z.extractall(ext_dst)
-    f.close()
-    os.remove(dst)
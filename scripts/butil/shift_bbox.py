@@ -1,94 +1,99 @@
+"""The shifted initial boxes of the spatial robustness evaluation (SRE).
+
+A shift type is one of
+
+    left, right, up, down                   the box moves by a tenth of its
+                                            size, rounded up
+    topLeft, topRight, bottomLeft,          the corner moves out by a tenth of
+    bottomRight                             the box's size
+    scale_<k>                               the box is scaled by k / 10 about
+                                            its center, e.g. scale_8 or
+                                            scale_10.5
+
+and the shifted box is clipped to the image. shift_init_BBs() shifts the
+boxes of any number of sequences by any number of shift types at once, so a
+denser set of shifts costs no more than a column per shift.
+"""
+
+import numpy as np
+
+_TRANSLATIONS = {'left': (-1, 0), 'right': (1, 0), 'up': (0, -1),
+    'down': (0, 1)}
+# which of the left, top, right, and bottom edges move out
+_CORNERS = {'topLeft': (1, 1, 0, 0), 'topRight': (0, 1, 1, 0),
+    'bottomLeft': (1, 0, 0, 1), 'bottomRight': (0, 0, 1, 1)}
+
+
+def shift_init_BBs(rects, shiftTypes, imgSizes):
+    """Shift initial boxes.
+
+    Args:
+        rects: N [x, y, w, h] boxes, one per sequence.
+        shiftTypes: S shift types.
+        imgSizes: N (width, height) image sizes, one per sequence.
+
+    Returns:
+        An (N, S, 4) int64 array of the shifted boxes, with [i, j] the box of
+        sequence i shifted by shiftTypes[j]. An unknown shift type leaves the
+        box as it is, but clipped.
+
+    Raises:
+        ValueError: A scale_<k> shift type whose k is not a number.
+    """
+    r = np.asarray(rects, dtype=np.float64).reshape(-1, 1, 4)
+    imgW = np.asarray(imgSizes, dtype=np.float64).reshape(-1, 2)[:, 0:1]
+    imgH = np.asarray(imgSizes, dtype=np.float64).reshape(-1, 2)[:, 1:2]
+    x, y, w, h = r[..., 0], r[..., 1], r[..., 2], r[..., 3]
+
+    count = len(shiftTypes)
+    move = np.zeros((2, count))
+    edges = np.zeros((4, count), dtype=bool)
+    ratio = np.ones(count)
+    isScale = np.zeros(count, dtype=bool)
+    for j, shiftType in enumerate(shiftTypes):
+        if shiftType in _TRANSLATIONS:
+            move[:, j] = _TRANSLATIONS[shiftType]
+        elif shiftType in _CORNERS:
+            edges[:, j] = _CORNERS[shiftType]
+        elif shiftType.startswith('scale_'):
+            ratio[j] = float(shiftType[len('scale_'):]) / 10
+            isScale[j] = True
+
+    # Each family of shifts is computed for every column, and each column
+    # takes the one of its shift type.
+    left = x + move[0] * np.round(0.1 * w + 0.5)
+    top = y + move[1] * np.round(0.1 * h + 0.5)
+    newW = np.broadcast_to(w, left.shape)
+    newH = np.broadcast_to(h, top.shape)
+
+    right = x + w - 1
+    bottom = y + h - 1
+    left = np.where(edges[0], np.round(x - 0.1 * w), left)
+    top = np.where(edges[1], np.round(y - 0.1 * h), top)
+    right = np.where(edges[2], np.round(right + 0.1 * w), right)
+    bottom = np.where(edges[3], np.round(bottom + 0.1 * h), bottom)
+    corner = edges.any(axis=0)
+    newW = np.where(corner, right - left + 1, newW)
+    newH = np.where(corner, bottom - top + 1, newH)
+
+    scaledW = ratio * w
+    scaledH = ratio * h
+    left = np.where(isScale, np.round(x + w / 2.0 - scaledW / 2.0), left)
+    top = np.where(isScale, np.round(y + h / 2.0 - scaledH / 2.0), top)
+    newW = np.where(isScale, np.round(scaledW), newW)
+    newH = np.where(isScale, np.round(scaledH), newH)
+
+    left = np.maximum(left, 1)
+    top = np.maximum(top, 1)
+    newW = np.where(left + newW - 1 > imgW, imgW - left + 1, newW)
+    newH = np.where(top + newH - 1 > imgH, imgH - top + 1, newH)
+    return np.stack([left, top, newW, newH], axis=-1).astype(np.int64)
 
-def shift_init_BB(r, shiftType, imgH, imgW):
 
-    center = [r[0]+r[2]/2.0, r[1]+r[3]/2.0]
-
-    br_x = r[0] + r[2] - 1
-    br_y = r[1] + r[3] - 1
-
-    if shiftType == 'scale_7':
-        ratio = 0.7
-        w = ratio * r[2]
-        h = ratio * r[3]
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'scale_8':
-        ratio = 0.8
-        w = ratio * r[2]
-        h = ratio * r[3]
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'scale_9':
-        ratio = 0.9
-        w = ratio * r[2]
-        h = ratio * r[3]
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'scale_11':
-        ratio = 1.1
-        w = ratio * r[2]
-        h = ratio * r[3]
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'scale_12':
-        ratio = 1.2
-        w = ratio * r[2] # 104.4
-        h = ratio * r[3] # 382.8
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'scale_13':
-        ratio = 1.3
-        w = ratio * r[2]
-        h = ratio * r[3]
-        r = map(round, [center[0]-w/2.0, center[1]-h/2.0, w, h])
-
-    elif shiftType == 'left':
-        r[0] -= round(0.1 * r[2] + 0.5)
-
-    elif shiftType == 'right':
-        r[0] += round(0.1 * r[2] + 0.5)
-
-    elif shiftType == 'up':
-        r[1] -= round(0.1 * r[3] + 0.5)
-
-    elif shiftType == 'down':
-        r[2] += round(0.1 * r[3] + 0.5)
-
-    elif shiftType == 'topLeft':
-        r[0] = round(r[0] - 0.1 * r[2])
-        r[1] = round(r[1] - 0.1 * r[3])
-        r[2] = br_x - r[0] + 1
-        r[3] = br_y - r[1] + 1
-
-    elif shiftType == 'topRight':
-        br_x = round(br_x + 0.1 * r[2])
-        r[1] = round(r[1] - 0.1 * r[3])
-        r[2] = br_x - r[0] + 1
-        r[3] = br_y - r[1] + 1
-
-    elif shiftType == 'bottomLeft':
-        r[0] = round(r[0] - 0.1 * r[2])
-        br_y = round(br_y + 0.1 * r[3])
-        r[2] = br_x - r[0] + 1
-        r[3] = br_y - r[1] + 1
-
-    elif shiftType == 'bottomRight':
-        br_x = round(br_x + 0.1 * r[2])
-        br_y = round(br_y + 0.1 * r[3])
-        r[2] = br_x - r[0] + 1
-        r[3] = br_y - r[1] + 1
-
-    if r[0] < 1:
-        r[0] = 1
-
-    if r[1] < 1:
-        r[1] = 1
-
-    if r[0] + r[2] - 1 > imgW:
-        r[2] = imgW - r[0] + 1
-
-    if r[1] + r[3] - 1 > imgH:
-        r[3] = imgH - r[1] + 1
-
-    return r
+def shift_init_BB(r, shiftType, imgH, imgW):
+    """Shift one initial box; see shift_init_BBs().
 
+    Returns:
+        The shifted [x, y, w, h] box, as a list of ints.
+    """
+    return shift_init_BBs([r], [shiftType], [(imgW, imgH)])[0, 0].tolist()
@@ -1,6 +1,6 @@
-import copy
 import numpy as np
 from config import *
+from scripts.model.sequence import SubSequence
 
 def split_seq_TRE(seq, segNum, rect_anno):
     minNum = 20;
@@ -12,7 +12,7 @@ def split_seq_TRE(seq, segNum, rect_anno):
         if not isinstance(idxExclude[0], np.ndarray):
             idxExclude = [idxExclude]
 
-    idx = range(1, seq.len + 1)
+    idx = list(range(1, seq.len + 1))
 
     for j in range(len(idxExclude)):
         begin = idxExclude[j][0] - 1
@@ -40,13 +40,8 @@ def split_seq_TRE(seq, segNum, rect_anno):
 
     for i in range(len(startFrIdxOne)):
         index = idx[startFrIdxOne[i] - 1] - 1
-        subS = copy.deepcopy(seq)
-        subS.startFrame = index + seq.startFrame
-        subS.len = subS.endFrame - subS.startFrame + 1
-        subS.annoBegin = seq.startFrame
-        subS.init_rect = rect_anno[index]
+        subS = SubSequence(seq, index, [int(x) for x in rect_anno[index]])
         anno = rect_anno[index:]
-        subS.s_frames = seq.s_frames[index:]
         subSeqs.append(subS)
         subAnno.append(anno)
 
@@ -2,6 +2,9 @@ from collections import OrderedDict
 from config import *
 
 class Result:
+    __slots__ = ('tracker', 'seqName', 'startFrame', 'endFrame', 'evalType',
+        'fps', 'timing', 'shiftType', 'resType', 'tmplsize', 'res')
+
     # tracker : trakcer name
     # seqName : Sequence name
     # startFrame : start frame number
@@ -9,9 +12,11 @@ class Result:
     # res : results 
     # resType : result type
     # fps
+    # timing : seconds spent in the startup, init, track and teardown phases
 
     def __init__(self, tracker, seqName, startFrame, endFrame, 
-        resType, evalType, res, fps, shiftType=None, tmplsize=None):
+        resType, evalType, res, fps, shiftType=None, tmplsize=None,
+        timing=None):
         self.tracker = tracker
         self.seqName = seqName
         self.startFrame = startFrame
@@ -20,32 +25,10 @@ class Result:
         self.evalType = evalType
         self.res = res
         self.fps = fps
+        self.timing = timing
         self.shiftType = shiftType
         self.tmplsize = tmplsize
-        
-        self.__dict__ = OrderedDict([
-            ('tracker', self.tracker),
-            ('seqName', self.seqName),
-            ('startFrame', self.startFrame),
-            ('endFrame', self.endFrame),
-            ('evalType', self.evalType),
-            ('fps', self.fps),
-            ('shiftType', self.shiftType),
-            ('resType', self.resType),
-            ('tmplsize', self.tmplsize),
-            ('res', self.res)])
 
-    def refresh_dict(self):
-        self.__dict__ = OrderedDict([
-            ('tracker', self.tracker),
-            ('seqName', self.seqName),
-            ('startFrame', self.startFrame),
-            ('endFrame', self.endFrame),
-            ('evalType', self.evalType),
-            ('fps', self.fps),
-            ('shiftType', self.shiftType),
-            ('resType', self.resType),
-            ('tmplsize', self.tmplsize),
-            ('res', self.res)])
-        
-        
+    def to_dict(self):
+        # The fields in the order of the JSON files
+        return OrderedDict((f, getattr(self, f)) for f in self.__slots__)
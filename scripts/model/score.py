@@ -3,6 +3,10 @@ from config import *
 
 ##########################################################
 class Score:
+    __slots__ = ('name', 'desc', 'tracker', 'evalType', 'seqs', 'overlap',
+        'error', 'overlapScores', 'errorNum', 'successRateList',
+        'precisionList', 'successRateCI', 'precisionCI', 'pValues')
+
     # name
     # desc
     # ovelapScores
@@ -10,10 +14,14 @@ class Score:
     # overlap
     # error
     # successRateList
+    # successRateCI, precisionCI : [lower, upper] bootstrap confidence bands
+    # pValues : {tracker : {'success' : p, 'precision' : p}}
+    #   see scripts/butil/bootstrap.py
 
     def __init__(self, name, desc, tracker=None, evalType=None, seqs=[],
         overlapScores=[], errorNum=[], overlap=0, error=0, successRateList=[],
-        precisionList=[]):
+        precisionList=[], successRateCI=None, precisionCI=None,
+        pValues=None):
         self.name = name
         self.desc = desc
         self.tracker = tracker
@@ -25,33 +33,13 @@ class Score:
         self.error = error
         self.successRateList = successRateList
         self.precisionList = precisionList
+        self.successRateCI = successRateCI
+        self.precisionCI = precisionCI
+        self.pValues = pValues
 
-        self.__dict__ = OrderedDict([
-            ('name', self.name),
-            ('desc', self.desc),
-            ('tracker', self.tracker),
-            ('evalType', self.evalType),
-            ('seqs', self.seqs),
-            ('overlap', self.overlap),
-            ('error', self.error),
-            ('overlapScores', self.overlapScores),
-            ('errorNum', self.errorNum),
-            ('successRateList', self.successRateList),
-            ('precisionList', self.precisionList)])
-
-    def refresh_dict(self):
-        self.__dict__ = OrderedDict([
-            ('name', self.name),
-            ('desc', self.desc),
-            ('tracker', self.tracker),
-            ('evalType', self.evalType),
-            ('seqs', self.seqs),
-            ('overlap', self.overlap),
-            ('error', self.error),
-            ('overlapScores', self.overlapScores),
-            ('errorNum', self.errorNum),
-            ('successRateList', self.successRateList),
-            ('precisionList', self.precisionList)])
+    def to_dict(self):
+        # The fields in the order of the JSON files
+        return OrderedDict((f, getattr(self, f)) for f in self.__slots__)
 
     def __lt__(self, other):
         return self.name < other.name
@@ -66,9 +54,21 @@ class Score:
 
 ##########################################################
 
+_attrLines = {}
+
 def getScoreList():
-    srcAttrFile = open(SEQ_SRC + ATTR_DESC_FILE)
-    attrLines = srcAttrFile.readlines()
+    # attr_desc.txt is read again only when it changes. The Scores are new
+    # on each call, since calc_result() fills them in.
+    src = SEQ_SRC + ATTR_DESC_FILE
+    stat = os.stat(src)
+    key = (src, stat.st_mtime_ns, stat.st_size)
+    attrLines = _attrLines.get(key)
+    if attrLines is None:
+        srcAttrFile = open(src)
+        attrLines = srcAttrFile.readlines()
+        srcAttrFile.close()
+        _attrLines.clear()
+        _attrLines[key] = attrLines
     attrList = []
     for line in attrLines:
         attr = Score.getScoreFromLine(line)
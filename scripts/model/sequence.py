@@ -1,12 +1,25 @@
 from collections import OrderedDict
 from config import *
+import scripts.butil.frame_pack
+import scripts.butil.frames
+import scripts.butil.gt_store
 
 ##########################################################
 
 class Sequence:
+    # The fields of cfg.json, in order, then the fields which are set by
+    # get_sub_seqs() and calc_result().
+    FIELDS = ('name', 'path', 'startFrame', 'endFrame', 'attributes', 'nz',
+        'ext', 'imgFormat', 'width', 'height', 'init_rect', 'gtRect')
+    __slots__ = FIELDS + ('len', 's_frames', 'subAnno', 'aveCoverage',
+        'aveErrCenter', 'errCoverage', 'errCenter')
+
+    # gtRect : ground truth, a read-only view of scripts.butil.gt_store
+    # width, height : the size of the frames, see scripts.butil.image_size
 
     def __init__(self, name, path, startFrame, endFrame, attributes, 
-        nz, ext, imgFormat, gtRect, init_rect):
+        nz, ext, imgFormat, gtRect=None, init_rect=None, width=None,
+        height=None):
         self.name = name
         self.path = path
         self.startFrame = startFrame
@@ -15,9 +28,142 @@ class Sequence:
         self.nz = nz
         self.ext = ext
         self.imgFormat = imgFormat
+        self.width = width
+        self.height = height
         self.gtRect = gtRect
         self.init_rect = init_rect
-        self.__dict__ = OrderedDict([
+
+    def to_dict(self):
+        return OrderedDict((f, getattr(self, f)) for f in self.FIELDS)
+
+    def frame(self, i):
+        # Frame i, counted from startFrame, as a read-only uint8 RGB array.
+        # It's a view of the sequence's frame pack, if it's packed, see
+        # scripts.butil.frame_pack; otherwise the image is decoded once by
+        # the frame provider.
+        pack = scripts.butil.frame_pack.get_pack(self.name)
+        if pack is not None:
+            return pack.frame(i)
+        return scripts.butil.frames.get_provider().get(
+            os.path.join(self.path, self.imgFormat.format(self.startFrame + i)))
+
+    def __getstate__(self):
+        # A view of the ground truth store is not pickled. Worker processes
+        # and deep copies map the same store instead of copying the array.
+        # The sub-sequence annotations are slices of gtRect, which
+        # split_seq_TRE() makes again when they are needed.
+        state = dict((f, getattr(self, f)) for f in self.__slots__
+            if f != 'subAnno' and hasattr(self, f))
+        if scripts.butil.gt_store.is_gt_view(self.gtRect, self.name):
+            state['gtRect'] = None
+            state['_gtInStore'] = True
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        if state.pop('_gtInStore', False):
+            state['gtRect'] = scripts.butil.gt_store.get_gt(state['name'])
+        for f, v in state.items():
+            setattr(self, f, v)
+
+
+class SubSequence:
+    """A segment of a Sequence, from one of its frames to its last frame.
+
+    A sub-sequence only stores where it starts, its initial rectangle, and its
+    shift type. Everything else is read from the parent sequence, and the
+    frame list and annotations are sliced when they are used, so the TRE and
+    SRE segments of a sequence don't copy it.
+    """
+
+    __slots__ = ('parent', 'start', 'end', 'init_rect', 'shiftType', '_name')
+
+    def __init__(self, parent, start, init_rect, shiftType=None):
+        # start, end : frame indices into the parent, end is exclusive
+        self.parent = parent
+        self.start = start
+        self.end = parent.endFrame - parent.startFrame + 1
+        self.init_rect = init_rect
+        self.shiftType = shiftType
+        self._name = None
+
+    @property
+    def name(self):
+        return self._name if self._name is not None else self.parent.name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @property
+    def path(self):
+        return self.parent.path
+
+    @property
+    def attributes(self):
+        return self.parent.attributes
+
+    @property
+    def nz(self):
+        return self.parent.nz
+
+    @property
+    def ext(self):
+        return self.parent.ext
+
+    @property
+    def imgFormat(self):
+        return self.parent.imgFormat
+
+    @property
+    def width(self):
+        return self.parent.width
+
+    @property
+    def height(self):
+        return self.parent.height
+
+    @property
+    def gtRect(self):
+        return self.parent.gtRect
+
+    @property
+    def startFrame(self):
+        return self.parent.startFrame + self.start
+
+    @property
+    def endFrame(self):
+        return self.parent.startFrame + self.end - 1
+
+    @property
+    def annoBegin(self):
+        return self.parent.startFrame
+
+    @property
+    def len(self):
+        return self.end - self.start
+
+    @property
+    def s_frames(self):
+        return self.parent.s_frames[self.start:self.end]
+
+    @property
+    def anno(self):
+        return self.parent.gtRect[self.start:]
+
+    def frame(self, i):
+        """Get frame i of the sub-sequence, see Sequence.frame()."""
+        return self.parent.frame(self.start + i)
+
+    def shifted(self, init_rect, shiftType):
+        """Get a sub-sequence with the same frames and another start box."""
+        subS = SubSequence(self.parent, self.start, init_rect, shiftType)
+        subS._name = self._name
+        return subS
+
+    def to_dict(self):
+        """Get the fields which the MATLAB trackers read, as a dictionary."""
+        d = OrderedDict([
             ('name', self.name),
             ('path', self.path),
             ('startFrame', self.startFrame),
@@ -27,8 +173,12 @@ class Sequence:
             ('ext', self.ext),
             ('imgFormat', self.imgFormat),
             ('init_rect', self.init_rect),
-            ('gtRect', self.gtRect)])
+            ('len', self.len),
+            ('annoBegin', self.annoBegin),
+            ('s_frames', self.s_frames)])
+        if self.shiftType is not None:
+            d['shiftType'] = self.shiftType
+        return d
 
 
-
-##########################################################
\ No newline at end of file
+##########################################################